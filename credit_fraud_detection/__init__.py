@@ -0,0 +1,15 @@
+"""Credit card fraud detection.
+
+Package form of the "Credit Fraud Detection" Colab notebook. The notebook's
+sections (data reading, target analysis, feature selection, oversampling,
+train/test split, the logistic regression, SVM, random forest, naive Bayes and
+CNN models, and validation) are callable stages, runnable from the command
+line with ``python -m credit_fraud_detection <stage>``.
+
+Only NumPy is imported eagerly; pandas, scikit-learn, imbalanced-learn,
+TensorFlow and the plotting libraries are imported by the stages that use them.
+"""
+
+from .data import COLUMNS, FEATURE_COLUMNS, ColumnarCache, build_cache, load_creditcard
+
+__all__ = ['COLUMNS', 'FEATURE_COLUMNS', 'ColumnarCache', 'build_cache', 'load_creditcard']
@@ -0,0 +1,103 @@
+"""Versioned store of fitted models.
+
+Each artifact lives in ``<root>/<name>/v0001/`` and holds the model file
+(joblib, or .keras for the CNN) next to ``artifact.json``, which records
+the feature list, the fingerprint of the training data, the fit parameters
+and the evaluation metrics. A stage that would refit a model with the same
+name, features, data fingerprint and parameters loads the stored one instead.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from .models import load_model, save_model
+
+MANIFEST = 'artifact.json'
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def artifact_key(name, features, fingerprint, params):
+    """Hash identifying a fit: same key means the refit would reproduce the artifact."""
+    payload = json.dumps([name, list(features), fingerprint, _jsonable(params)], sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class ArtifactStore:
+
+    def __init__(self, root):
+        self.root = root
+
+    def versions(self, name):
+        """Manifests of every stored version of ``name``, oldest first."""
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return []
+        manifests = []
+        for version in sorted(os.listdir(directory)):
+            path = os.path.join(directory, version, MANIFEST)
+            if os.path.isfile(path):
+                with open(path) as fh:
+                    manifests.append(json.load(fh))
+        return manifests
+
+    def latest(self, name):
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def find(self, name, features, fingerprint, params):
+        """Newest manifest whose fit matches, or None."""
+        key = artifact_key(name, features, fingerprint, params)
+        for manifest in reversed(self.versions(name)):
+            if manifest['key'] == key:
+                return manifest
+        return None
+
+    def save(self, name, model, features, fingerprint, params, metrics=None, extra=None):
+        """Store ``model`` as the next version of ``name`` and return its manifest."""
+        versions = self.versions(name)
+        number = int(versions[-1]['version'].lstrip('v')) + 1 if versions else 1
+        version = 'v%04d' % number
+        directory = os.path.join(self.root, name, version)
+        tmp_dir = directory + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        model_file = os.path.basename(save_model(model, os.path.join(tmp_dir, 'model')))
+        manifest = {
+            'name': name,
+            'version': version,
+            'key': artifact_key(name, features, fingerprint, params),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'model_file': model_file,
+            'features': list(features),
+            'data_fingerprint': fingerprint,
+            'params': _jsonable(params),
+            'metrics': _jsonable(metrics or {}),
+        }
+        manifest.update(_jsonable(extra or {}))
+        with open(os.path.join(tmp_dir, MANIFEST), 'w') as fh:
+            json.dump(manifest, fh, indent=2)
+        os.replace(tmp_dir, directory)
+        return manifest
+
+    def model_path(self, manifest):
+        return os.path.join(self.root, manifest['name'], manifest['version'], manifest['model_file'])
+
+    def load(self, manifest, mmap_mode='r'):
+        """Load the model of a manifest; joblib models memory-map their arrays by default."""
+        return load_model(self.model_path(manifest), mmap_mode=mmap_mode)
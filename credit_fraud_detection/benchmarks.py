@@ -0,0 +1,240 @@
+"""Timing and memory benchmarks for every pipeline stage at several data scales.
+
+Each scale gets a creditcard.csv-shaped file of that many rows, drawn with
+replacement from the rows of the real data and kept in the bench directory
+for later runs. Every stage of the study then runs on it and is timed: csv
+parsing, correlation, the three feature rankings, oversampling, each model's
+fit and prediction, and the metrics. The peak allocation seen by
+tracemalloc, which includes NumPy buffers but not worker processes, is
+recorded as well, from a separate run: tracing would inflate the times.
+
+Results are written as JSON. ``compare`` lines a run up against a stored
+baseline and marks the stages that got slower or faster by more than a
+tolerance.
+"""
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from .data import CHUNKSIZE, COLUMNS, FEATURE_COLUMNS, build_cache
+
+SCALES = (100_000, 1_000_000, 10_000_000)
+MODELS = ('logistic_regression', 'svm', 'random_forest', 'naive_bayes', 'cnn')
+# Exact SVC is quadratic in the rows; it is fitted on a subsample at larger scales.
+FIT_ROWS = {'svm': 20_000}
+
+
+def scaled_csv(source, n_rows, path, random_state=0, chunksize=CHUNKSIZE):
+    """Write ``n_rows`` rows sampled with replacement from the ColumnarCache ``source`` as csv."""
+    import pandas as pd
+
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(random_state)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as fh:
+        for start in range(0, n_rows, chunksize):
+            rows = np.sort(rng.integers(0, source.n_rows, size=min(chunksize, n_rows - start)))
+            chunk = pd.DataFrame({column: np.asarray(source[column])[rows] for column in COLUMNS})
+            chunk.to_csv(fh, header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def timed(function, *args, **kwargs):
+    """Run ``function`` once, untraced; return (result, seconds)."""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def traced_peak(function, *args, **kwargs):
+    """Run ``function`` once under tracemalloc; return (result, peak traced megabytes)."""
+    tracemalloc.start()
+    try:
+        result = function(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak / 2 ** 20
+
+
+def _fit_function(name):
+    from . import models
+
+    if name == 'cnn':
+        return lambda X, y: models.fit_cnn(X, y, epochs=1, verbose=0)
+    return {
+        'logistic_regression': models.fit_logistic_regression,
+        'svm': models.fit_svm,
+        'random_forest': lambda X, y: models.fit_random_forest(X, y, n_jobs=-1),
+        'naive_bayes': models.fit_naive_bayes,
+    }[name]
+
+
+def warm_up():
+    """Import the estimator libraries up front, so no stage is charged for their import time."""
+    import importlib
+
+    for module in ('pandas', 'sklearn.feature_selection', 'sklearn.ensemble', 'sklearn.linear_model',
+                   'sklearn.naive_bayes', 'sklearn.svm', 'sklearn.model_selection', 'imblearn.over_sampling'):
+        importlib.import_module(module)
+
+
+def _available(name):
+    import importlib.util
+
+    return name != 'cnn' or importlib.util.find_spec('tensorflow') is not None
+
+
+def stage_benchmarks(csv_path, cache_dir, random_state=42, n_jobs=-1, models=MODELS):
+    """Yield (stage, rows, callable) in pipeline order; callables may use earlier stages' results.
+
+    ``rows`` is 'all', 'train' or 'test' for the part of the data a stage
+    processes, or a row count when it is capped.
+    """
+    from . import evaluation, features, sampling
+    from . import models as model_functions
+    from .correlation import streaming_correlation
+
+    state = {}
+
+    def load_csv():
+        state['cache'] = build_cache(csv_path, cache_dir)
+        return state['cache']
+
+    yield 'load_csv', 'all', load_csv
+
+    def load_frame():
+        state['frame'] = state['cache'].to_frame()
+        state['X'] = state['frame'][FEATURE_COLUMNS]
+        state['y'] = state['frame']['Class'].to_numpy()
+        return state['frame']
+
+    yield 'load_frame', 'all', load_frame
+    yield 'correlation', 'all', lambda: streaming_correlation(state['cache'], n_jobs=n_jobs)
+
+    def scale():
+        state['scaled'] = features.scaled_matrix(state['X'])
+        return state['scaled']
+
+    yield 'scale_features', 'all', scale
+    yield 'rank_chi2', 'all', lambda: features.chi2_scores(state['scaled'], state['y'])
+    yield 'rank_f_regression', 'all', lambda: features.f_regression_scores(state['scaled'], state['y'])
+    yield 'rank_extra_trees', 'all', lambda: features.extra_trees_scores(
+        state['scaled'], state['y'], random_state=random_state, n_jobs=n_jobs)
+    yield 'oversample', 'all', lambda: sampling.oversample(state['X'], state['y'], random_state=random_state)
+    yield 'oversample_indices', 'all', lambda: sampling.oversample_indices(state['y'], random_state=random_state)
+
+    def split():
+        state['split'] = model_functions.split(state['X'], state['y'], random_state=random_state)
+        return state['split']
+
+    yield 'split', 'all', split
+
+    for name in models:
+        if not _available(name):
+            continue
+
+        def fit(name=name):
+            X_train, _, y_train, _ = state['split']
+            if name in FIT_ROWS and len(y_train) > FIT_ROWS[name]:
+                X_train, _, y_train, _ = model_functions.split(X_train, y_train, random_state=random_state,
+                                                               test_size=len(y_train) - FIT_ROWS[name])
+            state[name] = _fit_function(name)(X_train, y_train)
+            return state[name]
+
+        def predict(name=name):
+            state[name + '_pred'] = model_functions.predict_classes(state[name], state['split'][1])
+            return state[name + '_pred']
+
+        def predict_scores(name=name):
+            state[name + '_score'] = model_functions.predict_scores(state[name], state['split'][1])
+            return state[name + '_score']
+
+        def metrics(name=name):
+            return evaluation.evaluate(state['split'][3], state[name + '_pred'], state[name + '_score'])
+
+        yield 'fit_' + name, FIT_ROWS.get(name, 'train'), fit
+        yield 'predict_' + name, 'test', predict
+        yield 'predict_scores_' + name, 'test', predict_scores
+        yield 'metrics_' + name, 'test', metrics
+
+
+def run_benchmarks(source, bench_dir, scales=SCALES, stages=None, random_state=42, n_jobs=-1, models=MODELS,
+                   repeat=1, verbose=True):
+    """Benchmark every stage at every scale; returns the JSON-ready report.
+
+    ``source`` is the ColumnarCache of the real data the scaled files are
+    drawn from; ``stages`` optionally restricts the report to those names
+    (stages they depend on still run, unreported). Each stage runs
+    ``repeat`` times untraced and keeps its fastest time, then once more
+    under tracemalloc for its peak memory.
+    """
+    os.makedirs(bench_dir, exist_ok=True)
+    warm_up()
+    results = []
+    for scale in scales:
+        csv_path = scaled_csv(source, scale, os.path.join(bench_dir, 'creditcard-%d.csv' % scale),
+                              random_state=random_state)
+        cache_dir = os.path.join(bench_dir, 'creditcard-%d.cache' % scale)
+        # train_test_split rounds the test part up.
+        n_test = int(np.ceil(0.2 * scale))
+        counts = {'all': scale, 'train': scale - n_test, 'test': n_test}
+        for stage, rows, function in stage_benchmarks(csv_path, cache_dir, random_state=random_state,
+                                                      n_jobs=n_jobs, models=models):
+            seconds = min(timed(function)[1] for _ in range(repeat))
+            peak_mb = traced_peak(function)[1]
+            rows = counts[rows] if rows in counts else min(rows, counts['train'])
+            if stages is not None and stage not in stages:
+                continue
+            result = {'scale': scale, 'stage': stage, 'rows': rows, 'seconds': seconds, 'peak_mb': peak_mb,
+                      'rows_per_sec': rows / seconds if seconds else float('inf')}
+            results.append(result)
+            if verbose:
+                print('%10d %-36s %10.3f s %10.1f MB %14.0f rows/s'
+                      % (scale, stage, seconds, peak_mb, result['rows_per_sec']))
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                    'platform': platform.platform(), 'cpu_count': os.cpu_count()},
+        'results': results,
+    }
+
+
+def save_report(report, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_report(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(report, baseline, tolerance=0.1, min_seconds=0.05):
+    """DataFrame of time and memory ratios against ``baseline``, one row per (scale, stage) in both.
+
+    ``status`` is 'slower' or 'faster' when the time ratio is outside
+    1 +/- ``tolerance`` and the times differ by more than ``min_seconds``
+    (shorter stages are mostly timer noise), else 'same'.
+    """
+    import pandas as pd
+
+    def frame(results):
+        return pd.DataFrame(results['results']).set_index(['scale', 'stage'])[['seconds', 'peak_mb']]
+
+    table = frame(baseline).join(frame(report), how='inner', lsuffix='_baseline')
+    table['time_ratio'] = table['seconds'] / table['seconds_baseline']
+    table['memory_ratio'] = table['peak_mb'] / table['peak_mb_baseline']
+    changed = (table['seconds'] - table['seconds_baseline']).abs() > min_seconds
+    table['status'] = np.where(changed & (table['time_ratio'] > 1 + tolerance), 'slower',
+                               np.where(changed & (table['time_ratio'] < 1 - tolerance), 'faster', 'same'))
+    return table
@@ -0,0 +1,295 @@
+"""Command line entry point: ``python -m credit_fraud_detection <stage>``."""
+
+import argparse
+import os
+
+STAGES = {
+    'load': 'load',
+    'describe': 'describe',
+    'correlation': 'correlation',
+    'features': 'feature_selection',
+    'oversample': 'oversample',
+    'split': 'train_test_split',
+    'logreg': 'logistic_regression',
+    'svm': 'svm',
+    'svm-compare': 'svm_comparison',
+    'random-forest': 'random_forest',
+    'naive-bayes': 'naive_bayes',
+    'cnn': 'cnn',
+    'cnn-benchmark': 'cnn_benchmark',
+    'incremental': 'incremental_training',
+    'zoo': 'model_zoo',
+    'cv': 'cross_validation',
+    'thresholds': 'threshold_analysis',
+    'evaluate': 'evaluate',
+    'validate': 'validate',
+    'report': 'report',
+    'tune': 'tune',
+}
+MODEL_STAGES = ('logreg', 'svm', 'svm-compare', 'random-forest', 'naive-bayes', 'cnn', 'cnn-benchmark', 'split',
+                'incremental', 'zoo', 'cv', 'thresholds', 'report', 'tune')
+
+
+def _model_path(args, name='random_forest'):
+    """--model, or the newest stored artifact of ``name`` under --model-dir."""
+    if args.model:
+        return args.model
+    from .artifacts import ArtifactStore
+
+    store = ArtifactStore(args.model_dir or 'models')
+    manifest = store.latest(name)
+    if manifest is None:
+        raise SystemExit('no %s artifact in %s; train it with --model-dir or pass --model'
+                         % (name, store.root))
+    return store.model_path(manifest)
+
+
+def serve(args):
+    from .serving import serve
+
+    serve(_model_path(args),
+          host=args.host, port=args.port, unix_socket=args.unix_socket,
+          max_delay=args.max_delay_ms / 1000, max_batch_size=args.max_batch_size)
+
+
+def load_test(args):
+    import json
+
+    from .serving import load_test
+
+    result = load_test(host=args.host, port=args.port, unix_socket=args.unix_socket,
+                       concurrency=args.concurrency, requests=args.requests, model_path=_model_path(args))
+    print(json.dumps(result, indent=2))
+
+
+def export_forest(args):
+    from .forest import export_forest
+    from .models import load_model
+
+    source = _model_path(args)
+    output = args.output or os.path.join(os.path.dirname(source), 'forest.flat')
+    forest = export_forest(load_model(source), output)
+    print('Exported %d trees (%d nodes) to %s' % (forest.n_trees, len(forest.feature), output))
+
+
+def export_linear(args):
+    from .linear import export_linear
+    from .models import load_model
+
+    source = _model_path(args, name='logistic_regression')
+    output = args.output or os.path.join(os.path.dirname(source), 'linear.coef')
+    scorer = export_linear(load_model(source), output)
+    print('Exported %d coefficients and the intercept to %s' % (scorer.n_features_in_, output))
+
+
+def score_auc(args):
+    import json
+
+    from .streaming_auc import accumulate_logs
+
+    if not args.logs:
+        raise SystemExit('score-auc needs --logs')
+    accumulator = accumulate_logs(args.logs, score_column=args.score_column, label_column=args.label_column,
+                                  n_bins=args.bins, n_jobs=args.n_jobs)
+    if args.output:
+        accumulator.save(args.output)
+    print(json.dumps(accumulator.summary(), indent=2))
+    if args.plots:
+        from . import plots
+
+        charts = plots.ChartWriter(args.plot_dir)
+        charts.submit('roc_curve', plots.plot_roc_curve, *accumulator.roc_curve())
+        print('Wrote %s' % charts.close()[0])
+
+
+def benchmark(args):
+    from .benchmarks import MODELS, SCALES, compare, load_report, run_benchmarks, save_report
+    from .data import load_creditcard
+
+    scales = [int(scale) for scale in args.scales.split(',')] if args.scales else SCALES
+    stages = args.stages.split(',') if args.stages else None
+    bench_dir = args.bench_dir or os.path.splitext(args.data)[0] + '.bench'
+    report = run_benchmarks(load_creditcard(args.data, cache_dir=args.cache_dir), bench_dir, scales=scales,
+                            stages=stages, random_state=args.random_state, n_jobs=args.n_jobs,
+                            models=args.models.split(',') if args.models else MODELS, repeat=args.repeat)
+    save_report(report, args.output or 'benchmarks.json')
+    if args.baseline:
+        table = compare(report, load_report(args.baseline), tolerance=args.tolerance)
+        print(table.to_string(float_format='%.3f'))
+        if (table['status'] == 'slower').any():
+            raise SystemExit('benchmark: %d stages slower than the baseline' % (table['status'] == 'slower').sum())
+
+
+def generate(args):
+    from . import synthetic
+
+    if not args.output or not args.rows:
+        raise SystemExit('generate needs --rows and --output')
+    if args.profile and os.path.exists(args.profile):
+        profile = synthetic.load_profile(args.profile)
+    else:
+        from .data import load_creditcard
+
+        profile = synthetic.fit_profile(load_creditcard(args.data, cache_dir=args.cache_dir))
+        if args.profile:
+            synthetic.save_profile(profile, args.profile)
+    path = synthetic.generate(profile, args.rows, args.output, random_state=args.random_state, n_jobs=args.n_jobs)
+    print('Wrote %d rows (fraud rate %.5f) to %s' % (args.rows, profile['fraud_rate'], path))
+
+
+# Commands that run outside the training pipeline.
+COMMANDS = {
+    'serve': serve,
+    'load-test': load_test,
+    'export-forest': export_forest,
+    'export-linear': export_linear,
+    'score-auc': score_auc,
+    'benchmark': benchmark,
+    'generate': generate,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m credit_fraud_detection',
+                                     description='Credit card fraud detection pipeline stages.')
+    parser.add_argument('stage', choices=list(STAGES) + ['all'] + list(COMMANDS))
+    parser.add_argument('--data', default=os.environ.get('CREDITCARD_CSV', 'creditcard.csv'),
+                        help='path to creditcard.csv (default: $CREDITCARD_CSV or ./creditcard.csv)')
+    parser.add_argument('--cache-dir', help='columnar cache directory (default: next to the csv)')
+    parser.add_argument('--feature-set', choices=['all', 'selected', 'velocity'],
+                        help='features used by model stages (default depends on the model); velocity adds '
+                             'windowed transaction counts and Amount aggregates')
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--random-state', type=int, default=42)
+    parser.add_argument('-k', type=int, default=10, help='number of top features to report')
+    parser.add_argument('--plots', action='store_true',
+                        help='write the notebook charts of each stage to --plot-dir (the report stage always does)')
+    parser.add_argument('--plot-dir', default='plots', help='directory for chart PNGs (default: plots)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='worker processes (-1: all cores)')
+    parser.add_argument('--balance', choices=['none', 'weights', 'indices'], default='none',
+                        help='rebalance training classes with sample weights or oversampled row indices')
+    parser.add_argument('--svm-mode', choices=['exact', 'approx'], default='exact',
+                        help='exact kernel SVC, or Nystroem features with a mini-batch SGD hinge loss')
+    parser.add_argument('--cnn-mode', choices=['arrays', 'tfdata'], default='arrays',
+                        help='train the CNN on in-memory arrays, or stream float32 batches from the '
+                             'columnar cache through tf.data')
+    parser.add_argument('--cnn-batch-size', type=int, default=64)
+    parser.add_argument('--intra-op-threads', type=int, help='TensorFlow threads per op (default: all cores)')
+    parser.add_argument('--inter-op-threads', type=int, default=2,
+                        help='TensorFlow ops run concurrently')
+    parser.add_argument('--cost-fp', type=float, default=1.0, help='cost of a false alarm (thresholds stage)')
+    parser.add_argument('--cost-fn', type=float, default=10.0, help='cost of a missed fraud (thresholds stage)')
+    parser.add_argument('--folds', type=int, default=5, help='folds for the cv stage')
+    parser.add_argument('--models', help='comma-separated models for the zoo, cv, thresholds, incremental and '
+                                         'benchmark stages (default: logistic_regression,svm,random_forest,'
+                                         'naive_bayes)')
+    parser.add_argument('--epochs', type=int, default=1, help='passes over the data (incremental stage)')
+    parser.add_argument('--chunksize', type=int, help='rows per chunk (incremental stage, default: 500000)')
+    parser.add_argument('--halving-factor', type=int, default=3,
+                        help='tune stage: keep the best 1/FACTOR of the candidates per round, on FACTOR times '
+                             'the rows (default: 3)')
+    parser.add_argument('--holdout', help='csv (or cache directory) the validate stage scores in full, '
+                                          'against --model or the random forest')
+    parser.add_argument('--profile-report', help='write per-stage wall/CPU time, peak memory and rows/sec '
+                                                 'to this JSON file')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='also trace allocations per stage with tracemalloc (slows the run)')
+    parser.add_argument('--cprofile', metavar='STAGE',
+                        help='run one stage (e.g. random-forest or random-forest/fit) under cProfile and '
+                             'dump STAGE.prof next to the report')
+    parser.add_argument('--model-dir', help='artifact store: fitted models are saved here and reused '
+                                            'when the data and parameters match')
+    parser.add_argument('--stage-cache', metavar='DIR',
+                        help='keep stage outputs (statistics, rankings, splits, fitted models...) here, keyed '
+                             'by their inputs, parameters and code, so reruns skip unchanged steps')
+    parser.add_argument('--stage-cache-size', type=float, default=2048,
+                        help='megabytes the stage cache may use before least recently used entries are '
+                             'evicted (default: 2048)')
+
+    serving = parser.add_argument_group('serve / load-test / export-forest / export-linear')
+    serving.add_argument('--model', help='model file, or exported forest or linear model directory (default: '
+                                         'newest random_forest, or for export-linear logistic_regression, '
+                                         'artifact in MODEL_DIR)')
+    serving.add_argument('--output', help='export-forest directory (default: forest.flat next to the model), '
+                                          'export-linear directory (default: linear.coef next to the model), '
+                                          '.npz file for the score-auc histograms, benchmark JSON report '
+                                          '(default: benchmarks.json), or generated .csv / cache directory')
+    serving.add_argument('--host', default='127.0.0.1')
+    serving.add_argument('--port', type=int, default=8000)
+    serving.add_argument('--unix-socket', help='listen on / connect to this Unix socket instead of TCP')
+    serving.add_argument('--max-delay-ms', type=float, default=2.0,
+                         help='longest a request waits for its micro-batch to fill')
+    serving.add_argument('--max-batch-size', type=int, default=1024)
+    serving.add_argument('--concurrency', type=int, default=32, help='load-test clients')
+    serving.add_argument('--requests', type=int, default=200, help='load-test requests per client')
+
+    logs = parser.add_argument_group('score-auc')
+    logs.add_argument('--logs', nargs='+', help='csv score logs or saved .npz accumulators to merge')
+    logs.add_argument('--score-column', default='score')
+    logs.add_argument('--label-column', default='Class')
+    logs.add_argument('--bins', type=int, default=16384, help='score histogram resolution')
+
+    bench = parser.add_argument_group('benchmark')
+    bench.add_argument('--scales', help='comma-separated row counts (default: 100000,1000000,10000000)')
+    bench.add_argument('--stages', help='comma-separated stages to report (default: all)')
+    bench.add_argument('--bench-dir', help='where the scaled datasets are kept (default: next to the csv)')
+    bench.add_argument('--baseline', help='JSON report to compare against; exits non-zero on slowdowns')
+    bench.add_argument('--repeat', type=int, default=1, help='runs per stage; the fastest is kept')
+    bench.add_argument('--tolerance', type=float, default=0.1, help='relative slowdown allowed by --baseline')
+
+    synthetic = parser.add_argument_group('generate')
+    synthetic.add_argument('--rows', type=int, help='synthetic rows to write')
+    synthetic.add_argument('--profile', help='JSON class profile to generate from; written from --data '
+                                             'first if it does not exist')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.stage in COMMANDS:
+        COMMANDS[args.stage](args)
+        return 0
+
+    from .pipeline import Pipeline
+    from .profiling import Profiler
+    from .stage_cache import StageCache
+
+    profiler = Profiler(enabled=bool(args.profile_report or args.cprofile), memory=args.profile_memory,
+                        profile_stage=args.cprofile,
+                        profile_dir=os.path.dirname(os.path.abspath(args.profile_report or 'profile.json')))
+    stage_cache = None
+    if args.stage_cache:
+        stage_cache = StageCache(args.stage_cache, max_bytes=int(args.stage_cache_size * 2 ** 20))
+
+    pipeline = Pipeline(args.data, cache_dir=args.cache_dir, test_size=args.test_size,
+                        random_state=args.random_state, k=args.k, plots=args.plots, plot_dir=args.plot_dir,
+                        n_jobs=args.n_jobs, balance=args.balance, model_dir=args.model_dir,
+                        svm_mode=args.svm_mode, cnn_mode=args.cnn_mode, cnn_batch_size=args.cnn_batch_size,
+                        cnn_threads=(args.intra_op_threads, args.inter_op_threads), profiler=profiler,
+                        stage_cache=stage_cache)
+    stages = list(STAGES) if args.stage == 'all' else [args.stage]
+    for stage in stages:
+        kwargs = {}
+        if args.feature_set and stage in MODEL_STAGES:
+            kwargs['feature_set'] = args.feature_set
+        if stage in ('zoo', 'cv', 'thresholds', 'incremental', 'report', 'tune') and args.models:
+            kwargs['names'] = args.models.split(',')
+        if stage == 'cv':
+            kwargs['n_splits'] = args.folds
+        if stage == 'tune':
+            kwargs['factor'] = args.halving_factor
+        if stage == 'incremental':
+            kwargs.update(epochs=args.epochs, chunksize=args.chunksize)
+        if stage == 'validate' and args.holdout:
+            kwargs.update(holdout=args.holdout, model_path=args.model)
+        if stage == 'thresholds':
+            kwargs.update(cost_fp=args.cost_fp, cost_fn=args.cost_fn)
+        with profiler.stage(stage):
+            getattr(pipeline, STAGES[stage])(**kwargs)
+    if 'charts' in vars(pipeline):
+        pipeline.charts.close()
+    if stage_cache is not None:
+        print('Stage cache: %d hits, %d misses' % (stage_cache.hits, stage_cache.misses))
+    if args.profile_report:
+        profiler.write(args.profile_report)
+    return 0
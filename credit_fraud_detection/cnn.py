@@ -0,0 +1,132 @@
+"""tf.data input pipeline and CPU tuning for the Conv1D CNN.
+
+The in-memory path (``models.fit_cnn``) reshapes the whole training matrix
+into a float32 copy. The functions here stream float32 batches straight from
+the memory-mapped columnar cache instead. Shuffled row indices are batched,
+and a parallel map gathers each batch's rows from the column files while
+prefetching overlaps the next batch with training. Only a few batches of
+features are in memory at any time.
+
+TensorFlow's thread pools are sized explicitly for CPU-only hosts, and every
+fit reports its epoch throughput in samples per second, so batch sizes and
+thread settings can be compared directly.
+"""
+
+import os
+import time
+
+import numpy as np
+
+SHUFFLE_BUFFER = 100_000
+
+
+def configure_threads(intra_op=None, inter_op=2):
+    """Size TensorFlow's CPU thread pools; call before the first TensorFlow op runs.
+
+    ``intra_op`` defaults to the number of cores: one pool parallelises
+    inside each op. ``inter_op`` bounds how many independent ops run at once,
+    and a small value avoids oversubscribing the intra-op pool.
+    """
+    import tensorflow as tf
+
+    intra_op = intra_op or os.cpu_count() or 1
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError:
+        # TensorFlow is already initialised; its pools can no longer be resized.
+        pass
+    return {'intra_op': tf.config.threading.get_intra_op_parallelism_threads(),
+            'inter_op': tf.config.threading.get_inter_op_parallelism_threads()}
+
+
+def throughput_callback(n_samples, verbose=1):
+    """Keras callback recording samples/sec of every epoch in ``callback.throughput``."""
+    from tensorflow import keras
+
+    class Throughput(keras.callbacks.Callback):
+
+        def __init__(self):
+            super().__init__()
+            self.throughput = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._started = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            rate = n_samples / (time.perf_counter() - self._started)
+            self.throughput.append(rate)
+            if logs is not None:
+                logs['samples_per_sec'] = rate
+            if verbose:
+                print('Epoch %d: %.0f samples/sec' % (epoch + 1, rate))
+
+    return Throughput()
+
+
+def row_dataset(cache, rows, columns, batch_size=64, shuffle_buffer=SHUFFLE_BUFFER, seed=None,
+                parallel_calls=None):
+    """tf.data.Dataset of (features, label) batches over ``rows`` of a ColumnarCache.
+
+    Features come out as float32 with shape (batch, len(columns), 1), the CNN
+    input layout. ``shuffle_buffer=0`` keeps the row order, for prediction.
+    """
+    import tensorflow as tf
+
+    arrays = [cache[column] for column in columns]
+    labels = cache['Class']
+    n_features = len(columns)
+
+    def gather(batch_rows):
+        # Sorted rows read the column files forwards; features and labels stay aligned.
+        batch_rows = np.sort(batch_rows)
+        features = np.empty((len(batch_rows), n_features, 1), dtype=np.float32)
+        for j, array in enumerate(arrays):
+            features[:, j, 0] = array[batch_rows]
+        return features, labels[batch_rows].astype(np.float32)
+
+    def load(batch_rows):
+        features, target = tf.numpy_function(gather, [batch_rows], (tf.float32, tf.float32))
+        features.set_shape([None, n_features, 1])
+        target.set_shape([None])
+        return features, target
+
+    dataset = tf.data.Dataset.from_tensor_slices(np.asarray(rows, dtype=np.int64))
+    if shuffle_buffer:
+        dataset = dataset.shuffle(min(shuffle_buffer, len(rows)), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(load, num_parallel_calls=parallel_calls or tf.data.AUTOTUNE,
+                          deterministic=not shuffle_buffer)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def predict_rows(model, cache, rows, columns, batch_size=1024):
+    """CNN scores of ``rows`` of a ColumnarCache, in ascending row order, gathered batch by batch."""
+    dataset = row_dataset(cache, np.sort(rows), columns, batch_size=batch_size, shuffle_buffer=0)
+    return np.asarray(model.predict(dataset.map(lambda features, _: features), verbose=0)).ravel()
+
+
+def fit_cnn_rows(cache, train_rows, columns, validation_rows=None, epochs=10, batch_size=64,
+                 shuffle_buffer=SHUFFLE_BUFFER, random_state=42, verbose=1, callbacks=None):
+    """Fit the notebook's CNN on ``train_rows`` streamed from the cache.
+
+    Oversampling works by passing resampled row indices as ``train_rows``.
+    Without ``callbacks`` the epoch throughput is printed.
+    """
+    import tensorflow as tf
+
+    from .models import build_cnn
+
+    np.random.seed(random_state)
+    tf.random.set_seed(random_state)
+    model = build_cnn(len(columns))
+    train = row_dataset(cache, train_rows, columns, batch_size=batch_size, shuffle_buffer=shuffle_buffer,
+                        seed=random_state)
+    validation = None
+    if validation_rows is not None:
+        validation = row_dataset(cache, validation_rows, columns, batch_size=max(batch_size, 1024),
+                                 shuffle_buffer=0)
+    if callbacks is None:
+        callbacks = [throughput_callback(len(train_rows), verbose=verbose)]
+    model.fit(train, epochs=epochs, verbose=verbose, validation_data=validation, callbacks=callbacks)
+    return model
@@ -0,0 +1,91 @@
+"""Incremental Pearson correlation over chunks of rows.
+
+Each chunk contributes its centred cross-product matrix, merged in float64
+with the pairwise update of Chan et al., so only an n_columns x n_columns
+matrix is ever held in memory. Accumulators over disjoint row ranges merge
+into the same result, which lets worker processes share the work.
+"""
+
+import numpy as np
+
+from .data import CHUNKSIZE
+from .parallel import effective_n_jobs
+
+
+class StreamingCorrelation:
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        n_columns = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+
+    def update(self, chunk):
+        """Add a chunk: a DataFrame or a mapping of column name to array."""
+        values = np.column_stack([np.asarray(chunk[column], dtype=np.float64) for column in self.columns])
+        if len(values):
+            mean = values.mean(axis=0)
+            centred = values - mean
+            self._merge(len(values), mean, centred.T @ centred)
+        return self
+
+    def merge(self, other):
+        if other.columns != self.columns:
+            raise ValueError('cannot merge correlations over different columns')
+        if other.count:
+            self._merge(other.count, other.mean, other.comoment)
+        return self
+
+    def _merge(self, n, mean, comoment):
+        total = self.count + n
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.count * n / total)
+        self.mean = self.mean + delta * (n / total)
+        self.count = total
+
+    def covariance(self, ddof=1):
+        return self.comoment / (self.count - ddof)
+
+    def correlation(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        # Constant columns have no defined correlation, as in DataFrame.corr().
+        corr[scale == 0, :] = np.nan
+        corr[:, scale == 0] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def to_frame(self):
+        """Correlation matrix as a DataFrame, ready for ``sns.heatmap``."""
+        import pandas as pd
+
+        return pd.DataFrame(self.correlation(), index=self.columns, columns=self.columns)
+
+
+def _correlate_range(cache_dir, columns, start, stop, chunksize):
+    from .data import ColumnarCache
+
+    accumulator = StreamingCorrelation(columns)
+    for chunk in ColumnarCache(cache_dir).iter_chunks(chunksize, columns=columns, start=start, stop=stop):
+        accumulator.update(chunk)
+    return accumulator
+
+
+def streaming_correlation(cache, columns=None, chunksize=CHUNKSIZE, n_jobs=1):
+    """StreamingCorrelation over a ColumnarCache, split across ``n_jobs`` processes."""
+    columns = cache.columns if columns is None else list(columns)
+    n_jobs = max(1, min(effective_n_jobs(n_jobs), -(-len(cache) // chunksize)))
+    if n_jobs == 1:
+        return _correlate_range(cache.cache_dir, columns, 0, len(cache), chunksize)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    bounds = np.linspace(0, len(cache), n_jobs + 1).astype(int)
+    result = StreamingCorrelation(columns)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        futures = [pool.submit(_correlate_range, cache.cache_dir, columns, start, stop, chunksize)
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        for future in futures:
+            result.merge(future.result())
+    return result
@@ -0,0 +1,122 @@
+"""Parallel stratified cross-validation with cached fold indices.
+
+Fold membership is stored as one int8 fold id per row, keyed by the dataset
+fingerprint, the number of folds and the seed. Every run over the same data
+therefore scores the models on the same folds. All (model, fold) pairs run
+in a process pool over the same memory-mapped feature matrix.
+
+Fold matrices are never copied for logistic regression, where a zero sample
+weight is the same as leaving the row out: it trains on the whole shared
+matrix with the held-out fold weighted 0. The other models would still see
+the held-out rows (the random forest's bootstrap draws them, naive Bayes
+smooths variances and SVC scales ``gamma='scale'`` by the variance of every
+row), so they train on the gathered training rows instead. The CNN takes no
+sample weights and is not cross-validated.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from .parallel import effective_n_jobs
+
+N_SPLITS = 5
+METRICS = ('precision', 'recall', 'f1', 'roc_auc')
+MODELS = ('logistic_regression', 'svm', 'svm_approx', 'random_forest', 'naive_bayes')
+WEIGHT_MASKED = ('logistic_regression',)
+
+
+def fold_ids(target, n_splits=N_SPLITS, random_state=42):
+    """Fold number of every row under a shuffled StratifiedKFold."""
+    from sklearn.model_selection import StratifiedKFold
+
+    target = np.asarray(target).ravel()
+    folds = np.empty(len(target), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for fold, (_, test_rows) in enumerate(splitter.split(np.zeros(len(target)), target)):
+        folds[test_rows] = fold
+    return folds
+
+
+def cached_fold_ids(target, fingerprint, cache_dir, n_splits=N_SPLITS, random_state=42):
+    """fold_ids, read from or written to ``cache_dir`` under the dataset fingerprint."""
+    key = hashlib.blake2b(json.dumps([fingerprint, n_splits, random_state]).encode(),
+                          digest_size=16).hexdigest()
+    path = os.path.join(cache_dir, 'folds-%s.npy' % key)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode='r')
+    folds = fold_ids(target, n_splits=n_splits, random_state=random_state)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, folds)
+    os.replace(tmp_path, path)
+    return folds
+
+
+def _fold_worker(name, fold, array_dir, balance, random_state):
+    from threadpoolctl import threadpool_limits
+
+    from . import models, sampling
+    from .evaluation import evaluate
+    from .zoo import _fit_function
+
+    X, y, folds = (np.load(os.path.join(array_dir, array + '.npy'), mmap_mode='r')
+                   for array in ('X', 'y', 'folds'))
+    test_rows = np.flatnonzero(folds == fold)
+    params = {'random_state': random_state} if name in ('random_forest', 'svm_approx') else {}
+    if name in WEIGHT_MASKED:
+        X_fit, y_fit = X, y
+        weight = (np.asarray(folds) != fold).astype(np.float64)
+    else:
+        train_rows = np.flatnonzero(folds != fold)
+        X_fit, y_fit = X[train_rows], y[train_rows]
+        weight = np.ones(len(y_fit))
+    if balance != 'none':
+        fitted = weight > 0
+        weight[fitted] *= sampling.balanced_sample_weight(y_fit[fitted])
+    with threadpool_limits(limits=1):
+        model = _fit_function(name)(X_fit, y_fit, sample_weight=weight, **params)
+        X_test = X[test_rows]
+        metrics = evaluate(y[test_rows], models.predict_classes(model, X_test),
+                           models.predict_scores(model, X_test))
+    return name, fold, {metric: metrics[metric] for metric in METRICS}
+
+
+def cross_validate(X, y, folds, names, n_jobs=-1, balance='none', random_state=42):
+    """Score every model on every fold in parallel.
+
+    Returns (summary, per_fold): the summary DataFrame has the mean and
+    standard deviation of each metric per model; per_fold has one row per
+    (model, fold).
+    """
+    import pandas as pd
+
+    unsupported = set(names) - set(MODELS)
+    if unsupported:
+        raise ValueError('cannot cross-validate: %s' % ', '.join(sorted(unsupported)))
+    folds = np.asarray(folds)
+    n_splits = int(folds.max()) + 1
+    array_dir = tempfile.mkdtemp(prefix='fraud-cv-')
+    try:
+        from .zoo import write_arrays
+
+        write_arrays(array_dir, X=np.asarray(X, dtype=np.float32), y=np.asarray(y).ravel(), folds=folds)
+        tasks = [(name, fold) for name in names for fold in range(n_splits)]
+        workers = min(len(tasks), effective_n_jobs(n_jobs))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+            futures = [pool.submit(_fold_worker, name, fold, array_dir, balance, random_state)
+                       for name, fold in tasks]
+            results = [future.result() for future in futures]
+    finally:
+        shutil.rmtree(array_dir, ignore_errors=True)
+    per_fold = pd.DataFrame([dict(metrics, model=name, fold=fold) for name, fold, metrics in results])
+    per_fold = per_fold.set_index(['model', 'fold'])
+    summary = per_fold.groupby(level='model', sort=False).agg(['mean', 'std'])
+    summary.columns = ['%s_%s' % column for column in summary.columns]
+    return summary, per_fold
@@ -0,0 +1,180 @@
+"""Chunked loading of creditcard.csv into a memory-mapped columnar cache.
+
+The csv grows with every daily export, so it is parsed only once: each chunk is
+stored as float32 (Time, V1-V28, Amount) or int8 (Class) in one .npy file per
+column next to the csv. Later runs memory-map those files, and the cache is
+rebuilt whenever the size or modification time of the csv changes.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+FEATURE_COLUMNS = ['Time'] + ['V%d' % i for i in range(1, 29)] + ['Amount']
+COLUMNS = FEATURE_COLUMNS + ['Class']
+DTYPES = dict({column: np.float32 for column in FEATURE_COLUMNS}, Class=np.int8)
+CHUNKSIZE = 500_000
+
+
+class ColumnarCache:
+    """Read-only view over the per-column .npy files written by build_cache."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, 'meta.json')) as fh:
+            self.meta = json.load(fh)
+        self.columns = list(self.meta['columns'])
+        self.n_rows = self.meta['n_rows']
+        self._arrays = {}
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, column):
+        if column not in self._arrays:
+            if column not in self.columns:
+                raise KeyError(column)
+            path = os.path.join(self.cache_dir, column + '.npy')
+            self._arrays[column] = np.load(path, mmap_mode='r')
+        return self._arrays[column]
+
+    def iter_chunks(self, chunksize=CHUNKSIZE, columns=None, start=0, stop=None):
+        """Yield dicts of column slices, chunksize rows at a time, over rows [start, stop)."""
+        columns = self.columns if columns is None else list(columns)
+        stop = self.n_rows if stop is None else min(stop, self.n_rows)
+        for begin in range(start, stop, chunksize):
+            end = min(begin + chunksize, stop)
+            yield {column: self[column][begin:end] for column in columns}
+
+    @property
+    def fingerprint(self):
+        """Content hash of the cached columns, used to key derived caches."""
+        if 'fingerprint' not in self.meta:
+            self.meta['fingerprint'] = fingerprint_arrays([self[column] for column in self.columns],
+                                                          names=self.columns)
+        return self.meta['fingerprint']
+
+    def to_frame(self, columns=None):
+        """Materialise the cache as a DataFrame with the compact dtypes."""
+        import pandas as pd
+
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({column: np.asarray(self[column]) for column in columns}, columns=columns)
+
+
+def _column_hasher(name, dtype):
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(('%s:%s;' % (name, np.dtype(dtype).str)).encode())
+    return hasher
+
+
+def _combine_hashers(hashers):
+    combined = hashlib.blake2b(digest_size=16)
+    for hasher in hashers:
+        combined.update(hasher.digest())
+    return combined.hexdigest()
+
+
+def fingerprint_arrays(arrays, names=None, block=CHUNKSIZE):
+    """Hash of the contents of ``arrays``, independent of how they are chunked.
+
+    Arrays are hashed in row blocks, so memory-mapped columns are never loaded
+    whole. Fingerprints of the same columns written by build_cache agree.
+    """
+    names = ['%d' % i for i in range(len(arrays))] if names is None else names
+    hashers = []
+    for name, array in zip(names, arrays):
+        array = np.asarray(array)
+        hasher = _column_hasher(name, array.dtype)
+        for start in range(0, len(array), block):
+            hasher.update(np.ascontiguousarray(array[start:start + block]).tobytes())
+        hashers.append(hasher)
+    return _combine_hashers(hashers)
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'source': os.path.abspath(csv_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _count_rows(csv_path, block_size=1 << 24):
+    """Count data rows with a binary newline scan, far cheaper than parsing."""
+    newlines = 0
+    last = b'\n'
+    with open(csv_path, 'rb') as fh:
+        while True:
+            block = fh.read(block_size)
+            if not block:
+                break
+            newlines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        newlines += 1
+    return max(newlines - 1, 0)
+
+
+def build_cache(csv_path, cache_dir, chunksize=CHUNKSIZE):
+    """Parse csv_path in chunks into one memory-mapped .npy file per column."""
+    n_rows = _count_rows(csv_path)
+    tmp_dir = cache_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    arrays = {
+        column: np.lib.format.open_memmap(os.path.join(tmp_dir, column + '.npy'), mode='w+',
+                                          dtype=DTYPES[column], shape=(n_rows,))
+        for column in COLUMNS
+    }
+    import pandas as pd
+
+    hashers = [_column_hasher(column, DTYPES[column]) for column in COLUMNS]
+    filled = 0
+    for chunk in pd.read_csv(csv_path, usecols=COLUMNS, dtype=DTYPES, chunksize=chunksize):
+        stop = filled + len(chunk)
+        if stop > n_rows:
+            raise ValueError('%s has more rows than its line count; quoted newlines are not supported' % csv_path)
+        for column, hasher in zip(COLUMNS, hashers):
+            values = chunk[column].to_numpy()
+            arrays[column][filled:stop] = values
+            hasher.update(values.tobytes())
+        filled = stop
+    for array in arrays.values():
+        array.flush()
+    del arrays
+    if filled != n_rows:
+        # Blank lines are skipped by the parser; shrink the columns to what was read.
+        for column in COLUMNS:
+            path = os.path.join(tmp_dir, column + '.npy')
+            data = np.load(path, mmap_mode='r')[:filled].copy()
+            np.save(path, data)
+    meta = dict(_source_signature(csv_path), columns=COLUMNS, n_rows=filled,
+                fingerprint=_combine_hashers(hashers),
+                dtypes={column: np.dtype(DTYPES[column]).str for column in COLUMNS})
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as fh:
+        json.dump(meta, fh, indent=2)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    return ColumnarCache(cache_dir)
+
+
+def default_cache_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + '.cache'
+
+
+def load_creditcard(csv_path, cache_dir=None, chunksize=CHUNKSIZE):
+    """Open the columnar cache for csv_path, building it first if it is missing or stale.
+
+    ``csv_path`` may also be a cache directory with no csv behind it, such as
+    one written by :func:`credit_fraud_detection.synthetic.generate`.
+    """
+    if os.path.isdir(csv_path):
+        return ColumnarCache(csv_path)
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    if os.path.exists(os.path.join(cache_dir, 'meta.json')):
+        cache = ColumnarCache(cache_dir)
+        signature = _source_signature(csv_path)
+        if all(cache.meta.get(key) == value for key, value in signature.items()):
+            return cache
+    return build_cache(csv_path, cache_dir, chunksize=chunksize)
@@ -0,0 +1,149 @@
+"""Classification metrics for the fitted models.
+
+The notebook called accuracy_score, precision_score, recall_score, f1_score,
+roc_auc_score and confusion_matrix one after another, scanning the
+predictions six times. Here every metric comes from one confusion matrix,
+and the curves come from one sort of the scores. ``ThresholdSweep`` holds
+the confusion counts at every distinct score threshold. The ROC and PR
+curves, their areas, and cost-optimal cut-offs are all derived from it
+without another pass over the data.
+"""
+
+import numpy as np
+
+
+def confusion_counts(y_true, y_pred):
+    """2x2 confusion matrix [[tn, fp], [fn, tp]] from one bincount."""
+    y_true = np.asarray(y_true).ravel().astype(np.int64)
+    y_pred = np.asarray(y_pred).ravel().astype(np.int64)
+    return np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), 0.0)
+
+
+def metrics_from_counts(tn, fp, fn, tp):
+    """Accuracy, precision, recall and F1 from confusion counts (scalars or arrays)."""
+    precision = _ratio(tp, tp + fp)
+    recall = _ratio(tp, tp + fn)
+    return {
+        'accuracy': _ratio(tp + tn, tn + fp + fn + tp),
+        'precision': precision,
+        'recall': recall,
+        'f1': _ratio(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+class ThresholdSweep:
+    """Confusion counts at every distinct score threshold, from one descending sort.
+
+    Entry ``i`` counts the rows with ``score >= thresholds[i]`` as predicted
+    fraud. Ties share a threshold, as in scikit-learn's curves.
+    """
+
+    def __init__(self, y_true, y_score):
+        y_true = np.asarray(y_true).ravel()
+        y_score = np.asarray(y_score).ravel()
+        order = np.argsort(y_score, kind='stable')[::-1]
+        scores = y_score[order]
+        positives = (y_true[order] == 1).astype(np.int64)
+        # Last row of each run of equal scores.
+        ends = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+        self.thresholds = scores[ends]
+        self.tp = np.cumsum(positives)[ends]
+        self.fp = ends + 1 - self.tp
+        self.n_positive = int(positives.sum())
+        self.n_negative = len(positives) - self.n_positive
+        self.fn = self.n_positive - self.tp
+        self.tn = self.n_negative - self.fp
+
+    @property
+    def tpr(self):
+        return _ratio(self.tp, self.n_positive)
+
+    @property
+    def fpr(self):
+        return _ratio(self.fp, self.n_negative)
+
+    @property
+    def precision(self):
+        return _ratio(self.tp, self.tp + self.fp)
+
+    @property
+    def recall(self):
+        return self.tpr
+
+    def roc_curve(self):
+        """(fpr, tpr, thresholds), starting from the (0, 0) corner."""
+        return (np.r_[0.0, self.fpr], np.r_[0.0, self.tpr], np.r_[np.inf, self.thresholds])
+
+    def pr_curve(self):
+        """(precision, recall, thresholds) in order of decreasing threshold."""
+        return self.precision, self.recall, self.thresholds
+
+    def roc_auc(self):
+        if not self.n_positive or not self.n_negative:
+            return float('nan')
+        fpr, tpr, _ = self.roc_curve()
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def pr_auc(self):
+        """Average precision: precision weighted by each step in recall."""
+        if not self.n_positive:
+            return float('nan')
+        return float(np.sum(np.diff(np.r_[0.0, self.recall]) * self.precision))
+
+    def metrics(self):
+        """Accuracy, precision, recall and F1 at every threshold, as arrays."""
+        return metrics_from_counts(self.tn, self.fp, self.fn, self.tp)
+
+    def at(self, threshold):
+        """Confusion matrix and metrics when ``score >= threshold`` is flagged."""
+        i = np.searchsorted(-self.thresholds, -threshold, side='right') - 1
+        tp, fp = (int(self.tp[i]), int(self.fp[i])) if i >= 0 else (0, 0)
+        fn, tn = self.n_positive - tp, self.n_negative - fp
+        result = {key: float(value) for key, value in metrics_from_counts(tn, fp, fn, tp).items()}
+        result['confusion_matrix'] = np.array([[tn, fp], [fn, tp]])
+        return result
+
+    def optimal_threshold(self, cost_fp=1.0, cost_fn=1.0):
+        """Threshold minimising ``cost_fp * FP + cost_fn * FN``, and that cost."""
+        # Index -1 stands for flagging nothing.
+        costs = np.r_[cost_fn * self.n_positive, cost_fp * self.fp + cost_fn * self.fn]
+        best = int(np.argmin(costs))
+        threshold = np.inf if best == 0 else float(self.thresholds[best - 1])
+        return threshold, float(costs[best])
+
+
+def evaluate(y_true, y_pred, y_score=None):
+    """Accuracy, precision, recall, F1, ROC AUC, PR AUC and the confusion matrix.
+
+    The AUCs are computed from ``y_score`` when given, since hard 0/1
+    predictions only produce a two-point curve.
+    """
+    conf_mat = confusion_counts(y_true, y_pred)
+    (tn, fp), (fn, tp) = conf_mat
+    metrics = {key: float(value) for key, value in metrics_from_counts(tn, fp, fn, tp).items()}
+    sweep = ThresholdSweep(y_true, y_pred if y_score is None else y_score)
+    metrics.update(roc_auc=sweep.roc_auc(), pr_auc=sweep.pr_auc(), confusion_matrix=conf_mat)
+    return metrics
+
+
+def roc_curve(y_true, y_score):
+    """(fpr, tpr, auc) for plotting."""
+    sweep = ThresholdSweep(y_true, y_score)
+    fpr, tpr, _ = sweep.roc_curve()
+    return fpr, tpr, sweep.roc_auc()
+
+
+def print_metrics(metrics):
+    print('Accuracy:', metrics['accuracy'])
+    print('Precision:', metrics['precision'])
+    print('Recall:', metrics['recall'])
+    print('F1 score:', metrics['f1'])
+    print('ROC AUC score:', metrics['roc_auc'])
+    if 'pr_auc' in metrics:
+        print('PR AUC score:', metrics['pr_auc'])
+    print('Confusion matrix:\n', metrics['confusion_matrix'])
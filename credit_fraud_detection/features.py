@@ -0,0 +1,122 @@
+"""Feature selection: chi2, f_regression and ExtraTrees rankings.
+
+The features are MinMax-scaled once into a read-only float32 matrix that all
+three scorers share; they run concurrently in threads, since chi2 and
+f_regression are NumPy reductions and the forest fits in GIL-free Cython.
+f_regression scores and ExtraTrees splits do not change under per-feature
+affine scaling, so every scorer ranks the same matrix. Rankings are cached
+as JSON keyed by the dataset fingerprint and the scorer parameters.
+
+The correlation heatmap is computed by :mod:`credit_fraud_detection.correlation`.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SCORERS = ('chi2', 'f_regression', 'extra_trees')
+
+
+def scaled_matrix(features):
+    """MinMax-scaled float32 copy of ``features``, marked read-only."""
+    values = np.asarray(features, dtype=np.float32)
+    minimum = values.min(axis=0)
+    span = values.max(axis=0) - minimum
+    span[span == 0] = 1
+    scaled = (values - minimum) / span
+    scaled.flags.writeable = False
+    return scaled
+
+
+def _ranking(scores, columns):
+    import pandas as pd
+
+    return pd.Series(np.nan_to_num(scores), index=list(columns)).sort_values(ascending=False)
+
+
+def chi2_scores(scaled, target):
+    from sklearn.feature_selection import chi2
+
+    return chi2(scaled, target)[0]
+
+
+def f_regression_scores(scaled, target):
+    from sklearn.feature_selection import f_regression
+
+    return f_regression(scaled, target)[0]
+
+
+def extra_trees_scores(scaled, target, n_estimators=100, random_state=None, n_jobs=-1):
+    from sklearn.ensemble import ExtraTreesClassifier
+
+    model = ExtraTreesClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs)
+    return model.fit(scaled, target).feature_importances_
+
+
+def _cache_path(cache_dir, fingerprint, params):
+    key = hashlib.blake2b(json.dumps([fingerprint, params], sort_keys=True).encode(),
+                          digest_size=16).hexdigest()
+    return os.path.join(cache_dir, 'rankings-%s.json' % key)
+
+
+def rank_features(features, target, fingerprint=None, cache_dir=None, n_estimators=100,
+                  random_state=None, n_jobs=-1):
+    """Rankings of every feature by each scorer, best first, as a dict of Series.
+
+    When ``fingerprint`` and ``cache_dir`` are given the scores are read from,
+    or written to, a JSON file keyed by them and the scorer parameters.
+    """
+    columns = list(features.columns)
+    params = {'columns': columns, 'n_estimators': n_estimators, 'random_state': random_state}
+    path = None
+    if fingerprint is not None and cache_dir is not None:
+        path = _cache_path(cache_dir, fingerprint, params)
+        if os.path.exists(path):
+            with open(path) as fh:
+                scores = json.load(fh)['scores']
+            return {name: _ranking(scores[name], columns) for name in SCORERS}
+
+    # Import in this thread: first imports of sklearn racing in the workers see partially initialised modules.
+    import sklearn.ensemble
+    import sklearn.feature_selection
+
+    scaled = scaled_matrix(features)
+    target = np.asarray(target).ravel()
+    with ThreadPoolExecutor(max_workers=len(SCORERS)) as pool:
+        futures = {
+            'chi2': pool.submit(chi2_scores, scaled, target),
+            'f_regression': pool.submit(f_regression_scores, scaled, target),
+            'extra_trees': pool.submit(extra_trees_scores, scaled, target, n_estimators=n_estimators,
+                                       random_state=random_state, n_jobs=n_jobs),
+        }
+        scores = {name: np.nan_to_num(future.result()).tolist() for name, future in futures.items()}
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump({'fingerprint': fingerprint, 'params': params, 'scores': scores}, fh)
+        os.replace(tmp_path, path)
+    return {name: _ranking(scores[name], columns) for name in SCORERS}
+
+
+def consensus_ranking(rankings):
+    """Features ordered by their mean rank across scorers, best first."""
+    import pandas as pd
+
+    ranks = pd.DataFrame({name: ranking.rank(ascending=False) for name, ranking in rankings.items()})
+    return ranks.mean(axis=1).sort_values(kind='stable')
+
+
+def selected_columns(rankings, columns, k=10):
+    """The ``k`` best of ``columns`` by consensus rank, kept in ``columns`` order."""
+    top = set(consensus_ranking(rankings).index[:k])
+    return [column for column in columns if column in top]
+
+
+def select_features(features, columns):
+    """Keep only ``columns`` (the notebook's Features_New)."""
+    return features[list(columns)]
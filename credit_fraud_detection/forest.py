@@ -0,0 +1,142 @@
+"""Flat-array export and vectorized prediction for a fitted random forest.
+
+``export_forest`` concatenates the nodes of every tree into contiguous arrays
+(split feature, threshold, children, leaf class probabilities) written as one
+.npy file each, so worker processes can memory-map a single shared copy.
+``FlatForest.predict_proba`` then walks all trees for a batch of rows at once
+with NumPy gathers instead of calling 100 tree objects.
+
+Leaves have threshold +inf and are their own children, so a walk that has
+reached a leaf stays there; finished walks are dropped every few levels.
+
+Thresholds are stored as the largest float32 not above scikit-learn's float64
+threshold. Inputs are compared as float32, as scikit-learn does, so every
+split goes the same way and probabilities agree to float32 rounding.
+"""
+
+import json
+import os
+
+import numpy as np
+
+FORMAT = 'flat_forest'
+ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots')
+BATCH_ROWS = 8192
+COMPACT_EVERY = 4
+
+
+def _float32_floor(threshold):
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def flatten_forest(model):
+    """Dict of contiguous node arrays for a fitted RandomForest/ExtraTrees classifier."""
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        node_ids = np.arange(tree.node_count) + offset
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, _float32_floor(tree.threshold)).astype(np.float32))
+        # Column 0 is taken when x > threshold, column 1 when x <= threshold.
+        right = np.where(is_leaf, node_ids, tree.children_right + offset)
+        left = np.where(is_leaf, node_ids, tree.children_left + offset)
+        children.append(np.stack([right, left], axis=1).astype(np.int32))
+        value = tree.value[:, 0, :]
+        values.append((value / value.sum(axis=1, keepdims=True)).astype(np.float32))
+        roots.append(offset)
+        offset += tree.node_count
+    return {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'children': np.concatenate(children),
+        'value': np.concatenate(values),
+        'roots': np.asarray(roots, dtype=np.int32),
+    }
+
+
+def export_forest(model, path):
+    """Write the flattened forest to directory ``path``; returns a FlatForest over it."""
+    os.makedirs(path, exist_ok=True)
+    arrays = flatten_forest(model)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + '.npy'), array)
+    meta = {
+        'format': FORMAT,
+        'n_trees': len(arrays['roots']),
+        'n_nodes': len(arrays['feature']),
+        'n_features': int(model.n_features_in_),
+        'classes': np.asarray(model.classes_).tolist(),
+        'feature_names': [str(name) for name in getattr(model, 'feature_names_in_', [])],
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as fh:
+        json.dump(meta, fh, indent=2)
+    return FlatForest.load(path)
+
+
+def is_flat_forest(path):
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.isfile(meta_path):
+        return False
+    with open(meta_path) as fh:
+        return json.load(fh).get('format') == FORMAT
+
+
+class FlatForest:
+    """Random forest predictor over flat node arrays."""
+
+    def __init__(self, arrays, classes, n_features=None, feature_names=()):
+        for name in ARRAYS:
+            # Plain ndarray views of the mapped files skip np.memmap's per-result overhead.
+            setattr(self, name, np.asarray(arrays[name]))
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features
+        if len(feature_names):
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Open an exported forest; by default the arrays are memory-mapped read-only."""
+        with open(os.path.join(path, 'meta.json')) as fh:
+            meta = json.load(fh)
+        arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(arrays, meta['classes'], meta['n_features'], meta.get('feature_names', ()))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _leaves(self, X):
+        """Leaf node reached in every tree, shape (rows, trees)."""
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        children = self.children.reshape(-1)
+        nodes = np.tile(np.asarray(self.roots, dtype=np.intp), n_rows)
+        offsets = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        active = np.arange(len(nodes))
+        current = nodes
+        while current.size:
+            for _ in range(COMPACT_EVERY):
+                go_left = flat_X[offsets + self.feature[current]] <= self.threshold[current]
+                current = children[2 * current + go_left]
+            nodes[active] = current
+            walking = children[2 * current] != current
+            active, current, offsets = active[walking], current[walking], offsets[walking]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X, batch_rows=BATCH_ROWS):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or (self.n_features_in_ and X.shape[1] != self.n_features_in_):
+            raise ValueError('expected a 2-D array of %s features' % self.n_features_in_)
+        proba = np.empty((len(X), self.value.shape[1]), dtype=np.float32)
+        for start in range(0, len(X), batch_rows):
+            leaves = self._leaves(X[start:start + batch_rows])
+            proba[start:start + len(leaves)] = self.value[leaves].mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,150 @@
+"""Out-of-core training: models fitted chunk by chunk from the columnar cache.
+
+The in-memory stages materialise the whole feature matrix and split it with
+train_test_split. Here the memory-mapped columns are read ``chunksize``
+rows at a time, and each chunk is fed to an estimator that learns
+incrementally:
+
+* ``naive_bayes``: GaussianNB.partial_fit, which accumulates the same
+  per-class moments as a full fit;
+* ``logistic_regression``: SGDClassifier with log loss on standardised
+  features, the incremental stand-in for LogisticRegression;
+* ``cnn``: the notebook's CNN, trained on mini-batches of each chunk.
+
+Rows are held out by a hash of the row number and the seed, so train and
+test membership does not depend on the chunk size, and no index array over
+the whole file is needed. The split is not stratified; at the row counts
+that need this mode the fraud share of both parts is close to the overall
+rate.
+
+Rebalancing happens inside every chunk ('weights' or 'indices', as in the
+in-memory stages), so memory stays bounded by about two chunks however
+large the file is. Evaluation streams the held-out rows through a confusion
+matrix and the fixed-size score histograms of ``streaming_auc``.
+"""
+
+import numpy as np
+
+from .data import CHUNKSIZE
+
+INCREMENTAL_MODELS = ('naive_bayes', 'logistic_regression', 'cnn')
+
+
+def holdout_mask(start, stop, test_size=0.2, random_state=42):
+    """True for the test rows among rows [start, stop), from a splitmix64 hash of each row number."""
+    with np.errstate(over='ignore'):
+        z = np.arange(start, stop, dtype=np.uint64) + np.uint64(random_state) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)) < np.uint64(test_size * (1 << 53))
+
+
+def iter_chunks(cache, columns, part='train', chunksize=CHUNKSIZE, test_size=0.2, balance='none',
+                random_state=42, shuffle_seed=None):
+    """Yield (X, y, sample_weight) per chunk of the train or test rows.
+
+    X is a float32 (rows, features) array. ``random_state`` fixes the
+    held-out rows. With ``balance`` the train rows of each chunk are
+    rebalanced on their own: 'weights' gives balanced sample weights,
+    'indices' oversamples the chunk's minority rows. A ``shuffle_seed``
+    visits the chunks, and the rows within each, in a random order.
+    """
+    from .sampling import balanced_sample_weight, oversample_indices
+
+    shuffle = shuffle_seed is not None
+    rng = np.random.default_rng(shuffle_seed if shuffle else random_state)
+    starts = np.arange(0, cache.n_rows, chunksize)
+    if shuffle:
+        starts = rng.permutation(starts)
+    for start in starts:
+        stop = min(start + chunksize, cache.n_rows)
+        test = holdout_mask(start, stop, test_size=test_size, random_state=random_state)
+        rows = np.flatnonzero(test if part == 'test' else ~test)
+        if not len(rows):
+            continue
+        y = np.asarray(cache['Class'][start:stop])[rows]
+        weight = None
+        if part == 'train' and balance == 'weights':
+            weight = balanced_sample_weight(y)
+        elif part == 'train' and balance == 'indices':
+            resampled = oversample_indices(y, random_state=rng.integers(2 ** 32))
+            rows, y = rows[resampled], y[resampled]
+        if shuffle:
+            order = rng.permutation(len(rows))
+            rows, y = rows[order], y[order]
+            weight = None if weight is None else weight[order]
+        X = np.empty((len(rows), len(columns)), dtype=np.float32)
+        for j, column in enumerate(columns):
+            X[:, j] = np.asarray(cache[column][start:stop])[rows]
+        yield X, y, weight
+
+
+def fit_incremental(name, cache, columns, epochs=1, chunksize=CHUNKSIZE, test_size=0.2, balance='none',
+                    random_state=42, alpha=1e-4, batch_size=64, verbose=0):
+    """Fit ``name`` (one of INCREMENTAL_MODELS) on the train rows of ``cache``, one chunk at a time."""
+    def chunks(epoch):
+        return iter_chunks(cache, columns, part='train', chunksize=chunksize, test_size=test_size,
+                           balance=balance, random_state=random_state, shuffle_seed=random_state + epoch)
+
+    classes = np.array([0, 1])
+    if name == 'naive_bayes':
+        from sklearn.naive_bayes import GaussianNB
+
+        # The moments are exact after one pass; more epochs would count rows twice.
+        model = GaussianNB()
+        for X, y, weight in chunks(0):
+            model.partial_fit(X, y, classes=classes, sample_weight=weight)
+        return model
+
+    if name == 'logistic_regression':
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler()
+        for X, _, _ in iter_chunks(cache, columns, part='train', chunksize=chunksize, test_size=test_size,
+                                   random_state=random_state):
+            scaler.partial_fit(X)
+        classifier = SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state)
+        for epoch in range(epochs):
+            for X, y, weight in chunks(epoch):
+                classifier.partial_fit(scaler.transform(X), y, classes=classes, sample_weight=weight)
+        return Pipeline([('scale', scaler), ('logistic', classifier)])
+
+    if name == 'cnn':
+        import tensorflow as tf
+
+        from .models import build_cnn, cnn_input
+
+        tf.random.set_seed(random_state)
+        model = build_cnn(len(columns))
+        for epoch in range(epochs):
+            for X, y, weight in chunks(epoch):
+                model.fit(cnn_input(X), y, sample_weight=weight, batch_size=batch_size, epochs=1,
+                          shuffle=False, verbose=verbose)
+        return model
+
+    raise ValueError('unknown incremental model %r' % name)
+
+
+def evaluate_incremental(model, cache, columns, chunksize=CHUNKSIZE, test_size=0.2, random_state=42):
+    """evaluate()'s metrics over the held-out rows, streamed chunk by chunk.
+
+    The AUCs come from an AUCAccumulator, so they carry its binning error
+    (see streaming_auc), which is negligible at the default resolution.
+    """
+    from .evaluation import confusion_counts, metrics_from_counts
+    from .models import predict_classes, predict_scores
+    from .streaming_auc import AUCAccumulator
+
+    conf_mat = np.zeros((2, 2), dtype=np.int64)
+    accumulator = AUCAccumulator()
+    for X, y, _ in iter_chunks(cache, columns, part='test', chunksize=chunksize, test_size=test_size,
+                               random_state=random_state):
+        conf_mat += confusion_counts(y, predict_classes(model, X))
+        accumulator.update(predict_scores(model, X), y)
+    (tn, fp), (fn, tp) = conf_mat
+    metrics = {key: float(value) for key, value in metrics_from_counts(tn, fp, fn, tp).items()}
+    metrics.update(roc_auc=accumulator.roc_auc(), pr_auc=accumulator.pr_auc(), confusion_matrix=conf_mat)
+    return metrics
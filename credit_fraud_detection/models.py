@@ -0,0 +1,221 @@
+"""Train/test split and the classifiers compared in the study.
+
+Every estimator library is imported inside the function that needs it, so
+importing this module does not pull in scikit-learn or TensorFlow.
+"""
+
+import os
+
+import numpy as np
+
+
+def split(features, target, test_size=0.2, random_state=None):
+    """Stratified train/test split, returned as (X_train, X_test, y_train, y_test)."""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(features, target, stratify=target, test_size=test_size,
+                            random_state=random_state)
+
+
+def fit_logistic_regression(X_train, y_train, sample_weight=None, scale=False, **params):
+    """LogisticRegression, with ``scale`` behind a StandardScaler (lbfgs needs it to converge on Amount)."""
+    from sklearn.linear_model import LogisticRegression
+
+    if not scale:
+        return LogisticRegression(**params).fit(X_train, y_train, sample_weight=sample_weight)
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    model = make_pipeline(StandardScaler(), LogisticRegression(**params))
+    return model.fit(X_train, y_train, logisticregression__sample_weight=sample_weight)
+
+
+def fit_svm(X_train, y_train, sample_weight=None, **params):
+    from sklearn.svm import SVC
+
+    return SVC(**params).fit(X_train, y_train, sample_weight=sample_weight)
+
+
+def fit_approximate_svm(X_train, y_train, sample_weight=None, n_components=300, gamma='scale', alpha=1e-4,
+                        batch_size=50_000, epochs=5, random_state=42):
+    """Large-data stand-in for SVC: Nystroem RBF features and a hinge-loss SGD fitted in mini-batches.
+
+    The exact kernel solver scales worse than quadratically in the number of
+    rows; here the kernel map is fitted on ``n_components`` landmark rows and
+    each mini-batch is mapped on the fly, so time is linear and memory is
+    bounded by ``batch_size``. Returns a fitted scikit-learn Pipeline.
+    """
+    from sklearn.kernel_approximation import Nystroem
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    X_train = np.asarray(X_train, dtype=np.float32)
+    y_train = np.asarray(y_train).ravel()
+    rng = np.random.default_rng(random_state)
+    scaler = StandardScaler().fit(X_train)
+    if gamma == 'scale':
+        # SVC's default on standardised features, whose variance is 1.
+        gamma = 1.0 / X_train.shape[1]
+    landmarks = rng.choice(len(X_train), size=min(n_components, len(X_train)), replace=False)
+    kernel_map = Nystroem(gamma=gamma, n_components=len(landmarks), random_state=random_state)
+    kernel_map.fit(scaler.transform(X_train[landmarks]))
+    classifier = SGDClassifier(loss='hinge', alpha=alpha, random_state=random_state)
+    classes = np.unique(y_train)
+    for _ in range(epochs):
+        order = rng.permutation(len(X_train))
+        for start in range(0, len(order), batch_size):
+            rows = np.sort(order[start:start + batch_size])
+            batch = kernel_map.transform(scaler.transform(X_train[rows]))
+            weight = None if sample_weight is None else np.asarray(sample_weight)[rows]
+            classifier.partial_fit(batch, y_train[rows], classes=classes, sample_weight=weight)
+    return Pipeline([('scale', scaler), ('kernel', kernel_map), ('svm', classifier)])
+
+
+def compare_svm(X_train, X_test, y_train, y_test, n_rows=20_000, random_state=42, **approx_params):
+    """Exact SVC against fit_approximate_svm on the same stratified subsample.
+
+    Returns a DataFrame of accuracy, precision, recall and fit seconds for
+    both, plus their difference (approximate minus exact).
+    """
+    import time
+
+    import pandas as pd
+
+    from .evaluation import evaluate
+
+    def subsample(X, y, n):
+        if len(y) <= n:
+            return np.asarray(X, dtype=np.float32), np.asarray(y).ravel()
+        X_sub, _, y_sub, _ = split(X, y, test_size=1 - n / len(y), random_state=random_state)
+        return np.asarray(X_sub, dtype=np.float32), np.asarray(y_sub).ravel()
+
+    X_fit, y_fit = subsample(X_train, y_train, n_rows)
+    X_eval, y_eval = subsample(X_test, y_test, n_rows)
+    rows = {}
+    for name, fit in (('exact', fit_svm), ('approx', fit_approximate_svm)):
+        params = approx_params if name == 'approx' else {}
+        started = time.perf_counter()
+        model = fit(X_fit, y_fit, **params)
+        fit_seconds = time.perf_counter() - started
+        metrics = evaluate(y_eval, model.predict(X_eval), model.decision_function(X_eval))
+        rows[name] = {'accuracy': metrics['accuracy'], 'precision': metrics['precision'],
+                      'recall': metrics['recall'], 'roc_auc': metrics['roc_auc'], 'fit_seconds': fit_seconds}
+    table = pd.DataFrame(rows).T
+    table.loc['difference'] = table.loc['approx'] - table.loc['exact']
+    return table
+
+
+def fit_random_forest(X_train, y_train, sample_weight=None, n_estimators=100, random_state=42, **params):
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, **params)
+    return model.fit(X_train, y_train, sample_weight=sample_weight)
+
+
+def fit_naive_bayes(X_train, y_train, sample_weight=None, **params):
+    from sklearn.naive_bayes import GaussianNB
+
+    return GaussianNB(**params).fit(X_train, y_train, sample_weight=sample_weight)
+
+
+def cnn_input(X):
+    """Reshape a 2-D feature matrix to the (rows, features, 1) float32 CNN input."""
+    return np.expand_dims(np.asarray(X, dtype=np.float32), axis=2)
+
+
+def build_cnn(n_features):
+    """The Conv1D network used in the notebook, compiled for binary output."""
+    from tensorflow.keras.layers import Conv1D, Dense, Dropout, Flatten, MaxPooling1D
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential()
+    model.add(Conv1D(32, kernel_size=3, activation='relu', input_shape=(n_features, 1)))
+    model.add(MaxPooling1D(pool_size=2))
+    model.add(Flatten())
+    model.add(Dense(64, activation='relu'))
+    model.add(Dropout(0.5))
+    model.add(Dense(1, activation='sigmoid'))
+    model.compile(loss='binary_crossentropy', optimizer='adam', metrics=['accuracy'])
+    return model
+
+
+def fit_cnn(X_train, y_train, validation_data=None, epochs=10, batch_size=64, random_state=42, verbose=1,
+            sample_indices=None, callbacks=None):
+    """Fit the CNN; with ``sample_indices`` it trains on those rows through a lazy batch generator.
+
+    Without ``callbacks`` the epoch throughput is printed; cnn.fit_cnn_rows
+    streams the rows from the columnar cache instead of in-memory arrays.
+    """
+    import tensorflow as tf
+
+    from .cnn import throughput_callback
+
+    np.random.seed(random_state)
+    tf.random.set_seed(random_state)
+    model = build_cnn(np.shape(X_train)[1])
+    if validation_data is not None:
+        validation_data = (cnn_input(validation_data[0]), np.asarray(validation_data[1]))
+    n_samples = len(y_train) if sample_indices is None else len(sample_indices)
+    if callbacks is None:
+        callbacks = [throughput_callback(n_samples, verbose=verbose)]
+    if sample_indices is None:
+        model.fit(cnn_input(X_train), np.asarray(y_train), epochs=epochs, batch_size=batch_size,
+                  verbose=verbose, validation_data=validation_data, callbacks=callbacks)
+        return model
+
+    from .sampling import iter_batches, steps_per_epoch
+
+    batches = ((cnn_input(X), y) for X, y in iter_batches(X_train, y_train, sample_indices,
+                                                           batch_size=batch_size, random_state=random_state))
+    model.fit(batches, steps_per_epoch=steps_per_epoch(sample_indices, batch_size), epochs=epochs,
+              verbose=verbose, validation_data=validation_data, callbacks=callbacks)
+    return model
+
+
+def predict_scores(model, X):
+    """Fraud score for every row: probability where available, else the decision function."""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1]
+    if hasattr(model, 'decision_function'):
+        return model.decision_function(X)
+    # Keras models return a (rows, 1) sigmoid output.
+    return np.asarray(model.predict(cnn_input(X), verbose=0)).ravel()
+
+
+def predict_classes(model, X, threshold=0.5):
+    if hasattr(model, 'classes_'):
+        return model.predict(X)
+    return (predict_scores(model, X) > threshold).astype('int32')
+
+
+def save_model(model, path):
+    """Persist a fitted model: Keras models as ``path.keras``, others with joblib as ``path.joblib``."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if hasattr(model, 'classes_'):
+        import joblib
+
+        joblib.dump(model, path + '.joblib')
+        return path + '.joblib'
+    model.save(path + '.keras')
+    return path + '.keras'
+
+
+def load_model(path, mmap_mode=None):
+    """Load a model written by save_model (given the full file name), an exported flat forest or linear model."""
+    if os.path.isdir(path):
+        from .forest import FlatForest, is_flat_forest
+        from .linear import LinearScorer, is_linear_model
+
+        if is_flat_forest(path):
+            return FlatForest.load(path, mmap_mode=mmap_mode or 'r')
+        if is_linear_model(path):
+            return LinearScorer.load(path)
+        raise ValueError('%s is not an exported model' % path)
+    if path.endswith('.keras'):
+        from tensorflow import keras
+
+        return keras.models.load_model(path)
+    import joblib
+
+    return joblib.load(path, mmap_mode=mmap_mode)
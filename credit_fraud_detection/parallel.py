@@ -0,0 +1,13 @@
+"""Helpers shared by the stages that fan work out to processes."""
+
+import os
+
+
+def effective_n_jobs(n_jobs):
+    """Resolve a scikit-learn style ``n_jobs`` (-1 = all cores) to a worker count."""
+    cpus = os.cpu_count() or 1
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpus + 1 + n_jobs)
+    return max(1, n_jobs)
@@ -0,0 +1,752 @@
+"""The notebook's sections as stages over a shared, lazily computed state.
+
+Each stage method prints what the corresponding notebook cell showed and
+returns its result. Inputs such as the loaded frame or a train/test split are
+computed on first use and reused by later stages in the same process.
+
+With a ``stage_cache`` they are also reused across processes: the
+statistics, correlation, rankings, velocity features, splits and fitted
+models are looked up by a key chained from the data fingerprint, the
+parameters and the source of the code that computes them, so a rerun only
+recomputes the steps whose inputs or code changed.
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from . import evaluation, features, models, sampling
+from .data import load_creditcard
+from .profiling import Profiler
+
+
+class Pipeline:
+
+    def __init__(self, data_path, cache_dir=None, test_size=0.2, random_state=42, k=10, plots=False,
+                 plot_dir='plots', n_jobs=-1, balance='none', model_dir=None, svm_mode='exact', cnn_mode='arrays',
+                 cnn_batch_size=64, cnn_threads=(None, 2), profiler=None, stage_cache=None):
+        self.data_path = data_path
+        self.cache_dir = cache_dir
+        self.test_size = test_size
+        self.random_state = random_state
+        self.k = k
+        self.plots = plots
+        self.plot_dir = plot_dir
+        self.n_jobs = n_jobs
+        self.balance = balance
+        self.model_dir = model_dir
+        self.svm_mode = svm_mode
+        self.cnn_mode = cnn_mode
+        self.cnn_batch_size = cnn_batch_size
+        self.cnn_threads = cnn_threads
+        # Hooks around the steps below; a disabled Profiler costs next to nothing.
+        self.profiler = profiler or Profiler()
+        self.stage_cache = stage_cache
+        self.models = {}
+        # The feature set each entry of self.models was fitted on.
+        self.feature_sets = {}
+        self.metrics = {}
+        self._splits = {}
+
+    @cached_property
+    def data(self):
+        with self.profiler.stage('load') as record:
+            cache = load_creditcard(self.data_path, cache_dir=self.cache_dir)
+            record['rows'] = cache.n_rows
+        return cache
+
+    @cached_property
+    def frame(self):
+        with self.profiler.stage('to_frame', rows=self.data.n_rows):
+            return self.data.to_frame()
+
+    @cached_property
+    def features(self):
+        return self.frame.drop(columns='Class')
+
+    @cached_property
+    def target(self):
+        return self.frame['Class']
+
+    @cached_property
+    def velocity(self):
+        """Time-windowed count, sum and deviation of Amount before every transaction."""
+        from .velocity import velocity_features
+
+        def compute():
+            with self.profiler.stage('velocity_features', rows=self.data.n_rows):
+                return velocity_features(self.data['Time'], self.data['Amount'])
+
+        # Both this and the frame have a RangeIndex over the cache rows, so they join row for row.
+        return self._cached('features:velocity', compute)
+
+    def feature_set(self, name):
+        if name == 'all':
+            return self.features
+        if name == 'velocity':
+            return self.features.join(self.velocity)
+        if name == 'selected':
+            columns = features.selected_columns(self.rankings, self.features.columns, k=self.k)
+            return features.select_features(self.features, columns)
+        raise ValueError('unknown feature set %r' % name)
+
+    def feature_columns(self, feature_set='all'):
+        """Column names of a feature set, without building the frame (except to rank a cold 'selected')."""
+        from .data import FEATURE_COLUMNS
+
+        if feature_set == 'all':
+            return list(FEATURE_COLUMNS)
+        if feature_set == 'velocity':
+            from .velocity import feature_names
+
+            return list(FEATURE_COLUMNS) + feature_names()
+        if feature_set == 'selected':
+            return features.selected_columns(self.rankings, FEATURE_COLUMNS, k=self.k)
+        raise ValueError('unknown feature set %r' % feature_set)
+
+    def column_source(self, columns):
+        """Mapping of ``columns`` and 'Class' to per-row arrays: memory-mapped cache columns or velocity features."""
+        source = {}
+        for column in list(columns) + ['Class']:
+            source[column] = self.data[column] if column in self.data.columns else self.velocity[column].to_numpy()
+        return source
+
+    def split(self, feature_set='all'):
+        """(X_train, X_test, y_train, y_test) for a feature set, computed once."""
+        if feature_set not in self._splits:
+            X = self.feature_set(feature_set)
+
+            def compute():
+                with self.profiler.stage('split', rows=len(X)):
+                    X_train, X_test, _, _ = models.split(X, self.target, test_size=self.test_size,
+                                                         random_state=self.random_state)
+                return X.index.get_indexer(X_train.index), X.index.get_indexer(X_test.index)
+
+            # Only the row positions are cached; the frames are cheap to rebuild from them.
+            train, test = self._cached('split:%s' % feature_set, compute)
+            self._splits[feature_set] = (X.iloc[train], X.iloc[test], self.target.iloc[train],
+                                         self.target.iloc[test])
+        return self._splits[feature_set]
+
+    def split_rows(self):
+        """(train_rows, test_rows) cache row numbers of the split, without building the frame.
+
+        train_test_split permutes the same way whatever the features are, so
+        these are the rows behind split()'s X_train and X_test.
+        """
+        if 'rows' not in self._splits:
+            target = np.asarray(self.data['Class'])
+            train_rows, test_rows, _, _ = models.split(np.arange(self.data.n_rows), target,
+                                                       test_size=self.test_size, random_state=self.random_state)
+            self._splits['rows'] = (train_rows, test_rows)
+        return self._splits['rows']
+
+    def stage_key(self, node):
+        """Stage-cache key of a DAG node, chained from the keys of the nodes it is computed from.
+
+        ``node`` is 'data', 'statistics', 'correlation', 'rankings',
+        'features:<set>' or 'split:<set>'.
+        """
+        from .correlation import StreamingCorrelation, _correlate_range, streaming_correlation
+        from .stage_cache import stage_key
+        from .stats import StreamingStats, compute_stats
+
+        if node == 'data':
+            return self.data.fingerprint
+        if node == 'statistics':
+            return stage_key(node, {'random_state': self.random_state}, code=(compute_stats, StreamingStats),
+                             inputs=[self.stage_key('data')])
+        if node == 'correlation':
+            return stage_key(node, code=(streaming_correlation, _correlate_range, StreamingCorrelation),
+                             inputs=[self.stage_key('data')])
+        if node == 'rankings':
+            return stage_key(node, {'random_state': self.random_state},
+                             code=(features.rank_features, features.scaled_matrix, features.chi2_scores,
+                                   features.f_regression_scores, features.extra_trees_scores),
+                             inputs=[self.stage_key('data')])
+        if node == 'features:all':
+            return self.stage_key('data')
+        if node == 'features:velocity':
+            from .velocity import VelocityState, velocity_features
+
+            return stage_key(node, code=(velocity_features, VelocityState), inputs=[self.stage_key('data')])
+        if node == 'features:selected':
+            return stage_key(node, {'k': self.k}, code=(features.consensus_ranking, features.selected_columns),
+                             inputs=[self.stage_key('rankings')])
+        if node.startswith('split:'):
+            return stage_key(node, {'test_size': self.test_size, 'random_state': self.random_state},
+                             code=(models.split,), inputs=[self.stage_key('features:' + node[len('split:'):])])
+        raise ValueError('unknown stage %r' % node)
+
+    def _cached(self, node, compute, key=None):
+        """``compute()``, or its stored value when the stage cache already holds this node's key."""
+        if self.stage_cache is None:
+            return compute()
+        return self.stage_cache.cached(key or self.stage_key(node), compute, name=node)
+
+    # Stages
+
+    def load(self):
+        print(self.frame.head(3))
+        print(self.frame.dtypes)
+        return self.frame
+
+    @cached_property
+    def statistics(self):
+        from .stats import compute_stats
+
+        def compute():
+            with self.profiler.stage('statistics', rows=self.data.n_rows):
+                return compute_stats(self.data.iter_chunks(), self.data.columns, random_state=self.random_state)
+
+        return self._cached('statistics', compute)
+
+    @cached_property
+    def correlation_matrix(self):
+        from .correlation import streaming_correlation
+
+        def compute():
+            with self.profiler.stage('correlation', rows=self.data.n_rows):
+                return streaming_correlation(self.data, n_jobs=self.n_jobs).to_frame().round(2)
+
+        return self._cached('correlation', compute)
+
+    @cached_property
+    def charts(self):
+        from .plots import ChartWriter
+
+        return ChartWriter(self.plot_dir)
+
+    def amount_histogram(self, bins=50):
+        """(counts, edges) of Amount, binned chunk by chunk over the range the statistics found."""
+        from .plots import column_histogram
+
+        amount = list(self.statistics.columns).index('Amount')
+        return column_histogram(self.data, 'Amount', self.statistics.min[amount], self.statistics.max[amount],
+                                bins=bins)
+
+    def describe(self):
+        stats = self.statistics
+        print(stats.describe())
+        class_counts = stats.class_count_dict()
+        print('Total count:', stats.count)
+        print('Fraudulent cases:', class_counts.get(1, 0))
+        print('Non fraudulent cases:', class_counts.get(0, 0))
+        if self.plots:
+            from . import plots
+
+            self.charts.submit('class_counts', plots.plot_class_counts, class_counts)
+            self.charts.submit('amount_histogram', plots.plot_amount_histogram, *self.amount_histogram())
+        return class_counts
+
+    def correlation(self):
+        correlation = self.correlation_matrix
+        if self.plots:
+            from . import plots
+
+            self.charts.submit('correlation', plots.plot_correlation_heatmap, correlation)
+        return correlation
+
+    @cached_property
+    def rankings(self):
+        def compute():
+            with self.profiler.stage('feature_ranking', rows=len(self.features)):
+                return features.rank_features(self.features, self.target, fingerprint=self.data.fingerprint,
+                                              cache_dir=self.data.cache_dir, random_state=self.random_state,
+                                              n_jobs=self.n_jobs)
+
+        return self._cached('rankings', compute)
+
+    def feature_selection(self):
+        for name, ranking in self.rankings.items():
+            print('Selected Features (%s):' % name)
+            for feature in ranking.index[:self.k]:
+                print(feature)
+        selected = features.selected_columns(self.rankings, self.features.columns, k=self.k)
+        print('Selected Features (consensus):', ', '.join(selected))
+        if self.plots:
+            from . import plots
+
+            self.charts.submit('feature_importances', plots.plot_feature_importances,
+                               self.rankings['extra_trees'].iloc[:self.k], k=self.k)
+        return self.rankings
+
+    def oversample(self):
+        with self.profiler.stage('oversample', rows=len(self.target)):
+            indices = sampling.oversample_indices(self.target, random_state=self.random_state)
+        distribution = sampling.resampled_distribution(self.target, indices)
+        print('Class distribution after oversampling:', distribution)
+        if self.plots:
+            from . import plots
+
+            self.charts.submit('class_distribution', plots.plot_class_distribution, distribution)
+        return indices
+
+    def training_balance(self, y_train):
+        """Fit keyword arguments that rebalance the classes of ``y_train`` without copying rows.
+
+        ``balance`` is 'none', 'weights' (deterministic class-ratio sample
+        weights) or 'indices' (a random oversampling drawn as row indices,
+        passed to scikit-learn as occurrence counts).
+        """
+        if self.balance == 'none':
+            return {}
+        if self.balance == 'weights':
+            return {'sample_weight': sampling.balanced_sample_weight(y_train)}
+        if self.balance == 'indices':
+            indices = sampling.oversample_indices(y_train, random_state=self.random_state)
+            return {'sample_weight': sampling.index_weights(indices, len(y_train))}
+        raise ValueError('unknown balance mode %r' % self.balance)
+
+    def train_test_split(self, feature_set='all'):
+        X_train, X_test, y_train, y_test = self.split(feature_set)
+        print('Shapes XTrain:', X_train.shape)
+        print('Shapes XTest:', X_test.shape)
+        return X_train, X_test, y_train, y_test
+
+    @cached_property
+    def artifacts(self):
+        from .artifacts import ArtifactStore
+
+        return ArtifactStore(self.model_dir) if self.model_dir else None
+
+    def _fit_and_evaluate(self, name, fit, feature_set, extra=None, **params):
+        X_train, X_test, y_train, y_test = self.split(feature_set)
+        if name != 'cnn':
+            params = dict(self.training_balance(y_train), **params)
+        # Array-valued inputs are fully determined by the data and the settings below.
+        fit_params = {key: value for key, value in params.items()
+                      if key not in ('sample_weight', 'sample_indices', 'validation_data')}
+        fit_params.update(balance=self.balance, test_size=self.test_size, split_random_state=self.random_state)
+        columns = list(X_train.columns)
+        manifest = None
+        if self.artifacts is not None:
+            manifest = self.artifacts.find(name, columns, self.data.fingerprint, fit_params)
+        if manifest is not None:
+            print('%s: using stored artifact %s' % (name, manifest['version']))
+            model = self.artifacts.load(manifest)
+            metrics = dict(manifest['metrics'], confusion_matrix=np.asarray(manifest['metrics']['confusion_matrix']))
+        else:
+            def compute():
+                with self.profiler.stage('fit', rows=len(y_train)):
+                    model = fit(X_train, y_train, **params)
+                with self.profiler.stage('predict', rows=len(y_test)):
+                    y_pred = models.predict_classes(model, X_test)
+                    y_score = models.predict_scores(model, X_test)
+                with self.profiler.stage('evaluate', rows=len(y_test)):
+                    metrics = evaluation.evaluate(y_test, y_pred, y_score)
+                return model, metrics
+
+            if name == 'cnn' or self.stage_cache is None:
+                # Keras models do not pickle; the artifact store is their cache.
+                model, metrics = compute()
+            else:
+                from .stage_cache import stage_key
+
+                key = stage_key('model:%s' % name, fit_params,
+                                code=(fit, models.predict_classes, models.predict_scores, evaluation.evaluate,
+                                      evaluation.confusion_counts, evaluation.metrics_from_counts,
+                                      evaluation._ratio, evaluation.ThresholdSweep,
+                                      sampling.balanced_sample_weight, sampling.oversample_indices,
+                                      sampling.index_weights),
+                                inputs=[self.stage_key('split:%s' % feature_set)])
+                model, metrics = self._cached('model:%s' % name, compute, key=key)
+            if self.artifacts is not None:
+                manifest = self.artifacts.save(name, model, columns, self.data.fingerprint, fit_params, metrics,
+                                               extra=extra)
+        return self._record(name, feature_set, model, metrics)
+
+    def _record(self, name, feature_set, model, metrics, curve=None):
+        """Keep a fitted model and its metrics, print them and chart them; ``curve`` saves re-predicting."""
+        self.models[name] = model
+        self.metrics[name] = metrics
+        self.feature_sets[name] = feature_set
+        print('%s (%s features)' % (name, feature_set))
+        evaluation.print_metrics(metrics)
+        if self.plots:
+            from . import plots
+
+            self.charts.submit('confusion_matrix_%s' % name, plots.plot_confusion_matrix,
+                               metrics['confusion_matrix'], title='Confusion Matrix (%s)' % name)
+            self.charts.submit('roc_curve_%s' % name, plots.plot_roc_curves,
+                               {name: curve or self.roc_curve(name)})
+        return model, metrics
+
+    def model_name(self, name):
+        """Name a model is kept under; the svm stage fits 'svm' or 'svm_approx' according to ``svm_mode``."""
+        if name in ('svm', 'svm_approx'):
+            return 'svm_approx' if self.svm_mode == 'approx' else 'svm'
+        return name
+
+    def fitted(self, name, feature_set):
+        """Model ``name`` fitted on ``feature_set``, running its stage unless that is the model at hand."""
+        name = self.model_name(name)
+        if self.feature_sets.get(name) != feature_set:
+            getattr(self, 'svm' if name == 'svm_approx' else name)(feature_set=feature_set)
+        return self.models[name]
+
+    def roc_curve(self, name, feature_set=None):
+        """(fpr, tpr, auc) of a model on the test split, thinned to a few hundred points for plotting.
+
+        ``feature_set`` defaults to the one the model was fitted on.
+        """
+        from .plots import thin_curve
+
+        name = self.model_name(name)
+        feature_set = feature_set or self.feature_sets[name]
+        model = self.fitted(name, feature_set)
+        _, X_test, _, y_test = self.split(feature_set)
+        fpr, tpr, roc_auc = evaluation.roc_curve(y_test, models.predict_scores(model, X_test))
+        return thin_curve(fpr, tpr) + (roc_auc,)
+
+    def logistic_regression(self, feature_set='all'):
+        return self._fit_and_evaluate('logistic_regression', models.fit_logistic_regression, feature_set)
+
+    def svm(self, feature_set='selected'):
+        """SVC, or with ``svm_mode='approx'`` the Nystroem + SGD approximation for large data."""
+        if self.svm_mode == 'approx':
+            return self._fit_and_evaluate('svm_approx', models.fit_approximate_svm, feature_set,
+                                          random_state=self.random_state)
+        return self._fit_and_evaluate('svm', models.fit_svm, feature_set)
+
+    def svm_comparison(self, feature_set='selected', n_rows=20_000):
+        """Accuracy/recall of the approximate SVM against exact SVC on a subsample."""
+        X_train, X_test, y_train, y_test = self.split(feature_set)
+        table = models.compare_svm(X_train, X_test, y_train, y_test, n_rows=n_rows,
+                                   random_state=self.random_state)
+        print('SVM on %d-row subsamples (%s features)' % (min(n_rows, len(y_train)), feature_set))
+        print(table.to_string(float_format='%.4f'))
+        return table
+
+    def random_forest(self, feature_set='all'):
+        return self._fit_and_evaluate('random_forest', models.fit_random_forest, feature_set,
+                                      random_state=self.random_state)
+
+    def naive_bayes(self, feature_set='all'):
+        return self._fit_and_evaluate('naive_bayes', models.fit_naive_bayes, feature_set)
+
+    def _cnn_fit(self, feature_set, callbacks=None, validation=True):
+        """(fit function, params) for the CNN under the configured input mode and balance.
+
+        In 'tfdata' mode the fit function ignores its X and y arguments and
+        streams the split's rows from the cache; the frame is never built.
+        """
+        from . import cnn
+
+        cnn.configure_threads(*self.cnn_threads)
+        params = {'random_state': self.random_state, 'batch_size': self.cnn_batch_size}
+        if callbacks is not None:
+            params['callbacks'] = callbacks
+        if self.cnn_mode == 'arrays':
+            _, X_test, y_train, y_test = self.split(feature_set)
+            if self.balance != 'none':
+                # Keras gets the resampled rows from a batch generator instead of weights.
+                params['sample_indices'] = sampling.oversample_indices(y_train, random_state=self.random_state)
+            if validation:
+                params['validation_data'] = (X_test, y_test)
+            return models.fit_cnn, params
+        if self.cnn_mode != 'tfdata':
+            raise ValueError('unknown cnn mode %r' % self.cnn_mode)
+        train_rows, test_rows = self.split_rows()
+        if self.balance != 'none':
+            train_rows = train_rows[sampling.oversample_indices(self.data['Class'][train_rows],
+                                                                random_state=self.random_state)]
+        columns = self.feature_columns(feature_set)
+        source = self.column_source(columns)
+        validation_rows = test_rows if validation else None
+
+        def fit(X_train, y_train, **params):
+            return cnn.fit_cnn_rows(source, train_rows, columns, validation_rows=validation_rows, **params)
+
+        return fit, dict(params, shuffle_buffer=cnn.SHUFFLE_BUFFER)
+
+    def cnn(self, feature_set='all'):
+        fit, params = self._cnn_fit(feature_set)
+        if self.cnn_mode == 'tfdata':
+            return self._cnn_from_cache(fit, feature_set, params)
+        return self._fit_and_evaluate('cnn', fit, feature_set, **params)
+
+    def _cnn_from_cache(self, fit, feature_set, params):
+        """_fit_and_evaluate for the streamed CNN: the test rows are scored in batches from the cache too."""
+        from .cnn import predict_rows
+        from .plots import thin_curve
+
+        columns = self.feature_columns(feature_set)
+        source = self.column_source(columns)
+        train_rows, test_rows = self.split_rows()
+        # predict_rows scores in ascending row order; the metrics do not depend on the order.
+        y_test = np.asarray(source['Class'][np.sort(test_rows)])
+        fit_params = dict(params, balance=self.balance, test_size=self.test_size,
+                          split_random_state=self.random_state)
+        manifest = None
+        if self.artifacts is not None:
+            manifest = self.artifacts.find('cnn', columns, self.data.fingerprint, fit_params)
+        y_score = None
+        if manifest is not None:
+            print('cnn: using stored artifact %s' % manifest['version'])
+            model = self.artifacts.load(manifest)
+            metrics = dict(manifest['metrics'], confusion_matrix=np.asarray(manifest['metrics']['confusion_matrix']))
+        else:
+            with self.profiler.stage('fit', rows=len(train_rows)):
+                model = fit(None, None, **params)
+            with self.profiler.stage('predict', rows=len(test_rows)):
+                y_score = predict_rows(model, source, test_rows, columns)
+            with self.profiler.stage('evaluate', rows=len(test_rows)):
+                metrics = evaluation.evaluate(y_test, (y_score > 0.5).astype('int32'), y_score)
+            if self.artifacts is not None:
+                self.artifacts.save('cnn', model, columns, self.data.fingerprint, fit_params, metrics)
+        curve = None
+        if self.plots:
+            if y_score is None:
+                y_score = predict_rows(model, source, test_rows, columns)
+            fpr, tpr, roc_auc = evaluation.roc_curve(y_test, y_score)
+            curve = thin_curve(fpr, tpr) + (roc_auc,)
+        return self._record('cnn', feature_set, model, metrics, curve=curve)
+
+    def cnn_benchmark(self, feature_set='all', batch_sizes=(32, 64), epochs=2):
+        """Training samples/sec of the CNN at each batch size, under the configured input mode."""
+        import pandas as pd
+
+        from .cnn import throughput_callback
+
+        train_rows, _ = self.split_rows()
+        n_samples = len(train_rows)
+        if self.balance != 'none':
+            n_samples = len(sampling.oversample_indices(self.data['Class'][train_rows],
+                                                        random_state=self.random_state))
+        # The streamed fit ignores its X and y; only the arrays mode needs the frame.
+        X_train, y_train = None, None
+        if self.cnn_mode == 'arrays':
+            X_train, _, y_train, _ = self.split(feature_set)
+        rows = {}
+        default_batch_size = self.cnn_batch_size
+        try:
+            for batch_size in batch_sizes:
+                self.cnn_batch_size = batch_size
+                throughput = throughput_callback(n_samples, verbose=0)
+                # No validation data: Keras validates before on_epoch_end, which would count toward the epoch.
+                fit, params = self._cnn_fit(feature_set, callbacks=[throughput], validation=False)
+                fit(X_train, y_train, epochs=epochs, verbose=0, **params)
+                # The first epoch includes graph tracing; the rest is steady state.
+                steady = throughput.throughput[1:] or throughput.throughput
+                rows[batch_size] = {'first_epoch': throughput.throughput[0], 'samples_per_sec': np.mean(steady)}
+        finally:
+            self.cnn_batch_size = default_batch_size
+        table = pd.DataFrame(rows).T.rename_axis('batch_size')
+        print('CNN throughput (%s input, %s features)' % (self.cnn_mode, feature_set))
+        print(table.to_string(float_format='%.0f'))
+        return table
+
+    def incremental_training(self, feature_set='all', names=None, epochs=1, chunksize=None):
+        """Fit models chunk by chunk from the cache and evaluate them on streamed held-out rows.
+
+        Memory is bounded by the chunk size, not the file size. Results are
+        stored as 'incremental_<name>'.
+        """
+        from .data import CHUNKSIZE, FEATURE_COLUMNS
+        from .incremental import evaluate_incremental, fit_incremental
+
+        columns = FEATURE_COLUMNS
+        if feature_set == 'selected':
+            columns = features.selected_columns(self.rankings, FEATURE_COLUMNS, k=self.k)
+        elif feature_set != 'all':
+            raise ValueError('incremental training reads cached columns; feature set %r is not supported'
+                             % feature_set)
+        chunksize = chunksize or CHUNKSIZE
+        names = names or ('naive_bayes', 'logistic_regression')
+        for name in names:
+            key = 'incremental_' + name
+            params = {'epochs': epochs, 'chunksize': chunksize, 'balance': self.balance,
+                      'test_size': self.test_size, 'random_state': self.random_state}
+            manifest = None
+            if self.artifacts is not None:
+                manifest = self.artifacts.find(key, columns, self.data.fingerprint, params)
+            if manifest is not None:
+                print('%s: using stored artifact %s' % (key, manifest['version']))
+                model = self.artifacts.load(manifest)
+                metrics = dict(manifest['metrics'],
+                               confusion_matrix=np.asarray(manifest['metrics']['confusion_matrix']))
+            else:
+                with self.profiler.stage('fit_' + name, rows=self.data.n_rows * epochs):
+                    model = fit_incremental(name, self.data, columns, **params)
+                with self.profiler.stage('evaluate_' + name, rows=self.data.n_rows):
+                    metrics = evaluate_incremental(model, self.data, columns, chunksize=chunksize,
+                                                   test_size=self.test_size, random_state=self.random_state)
+                if self.artifacts is not None:
+                    self.artifacts.save(key, model, columns, self.data.fingerprint, params, metrics)
+            print('%s (%s features, %d-row chunks)' % (key, feature_set, chunksize))
+            evaluation.print_metrics(metrics)
+            self.models[key] = model
+            self.metrics[key] = metrics
+        return {name: self.metrics['incremental_' + name] for name in names}
+
+    def tune(self, feature_set='all', names=None, factor=3):
+        """Successive-halving search per model, then the winner fitted on the whole training split.
+
+        The refit goes through the artifact store like any other stage, with
+        the tuned parameters in its key and the search history in its
+        manifest, so serving and validation pick up the tuned model.
+        """
+        from .tuning import SEARCH_SPACES, successive_halving
+
+        X_train, _, y_train, _ = self.split(feature_set)
+        searches = {}
+        for name in names or SEARCH_SPACES:
+            with self.profiler.stage('search_%s' % name, rows=len(y_train)):
+                search = successive_halving(name, X_train, y_train, fingerprint=self.data.fingerprint,
+                                            checkpoint_dir=self.data.cache_dir, factor=factor, balance=self.balance,
+                                            n_jobs=self.n_jobs, random_state=self.random_state)
+            print('%s: best %s %.4f with %s' % (name, search['scoring'], search['best_score'],
+                                                 search['best_params']))
+            params = dict(search['best_params'])
+            if name == 'random_forest':
+                params.setdefault('random_state', self.random_state)
+            self._fit_and_evaluate(name, getattr(models, 'fit_' + name), feature_set, extra={'tuning': search},
+                                   **params)
+            searches[name] = search
+        return searches
+
+    def model_zoo(self, feature_set='all', names=None):
+        """Fit the models concurrently in worker processes and print one comparison table."""
+        from .zoo import DEFAULT_MODELS, run_zoo
+
+        X_train, X_test, y_train, y_test = self.split(feature_set)
+        table, results = run_zoo(X_train, X_test, y_train, y_test, names=names or DEFAULT_MODELS,
+                                 n_jobs=self.n_jobs, balance=self.balance, random_state=self.random_state)
+        print(table.to_string(float_format='%.4f'))
+        self.metrics.update(results)
+        return table
+
+    def threshold_analysis(self, feature_set='all', names=None, cost_fp=1.0, cost_fn=10.0):
+        """Metrics across thresholds and the cost-optimal cut-off of each model in ``names``.
+
+        ``names`` defaults to the random forest. Returns the ThresholdSweep of each model by name.
+        """
+        sweeps = {}
+        for name in map(self.model_name, names or ['random_forest']):
+            model = self.fitted(name, feature_set)
+            _, X_test, _, y_test = self.split(feature_set)
+            with self.profiler.stage('threshold_sweep', rows=len(y_test)):
+                sweep = evaluation.ThresholdSweep(y_test, models.predict_scores(model, X_test))
+            threshold, cost = sweep.optimal_threshold(cost_fp=cost_fp, cost_fn=cost_fn)
+            print('%s: ROC AUC %.4f, PR AUC %.4f' % (name, sweep.roc_auc(), sweep.pr_auc()))
+            print('Cost-optimal threshold (FP cost %g, FN cost %g): %g, cost %g'
+                  % (cost_fp, cost_fn, threshold, cost))
+            evaluation.print_metrics(dict(sweep.at(threshold), roc_auc=sweep.roc_auc(), pr_auc=sweep.pr_auc()))
+            sweeps[name] = sweep
+        return sweeps
+
+    def cross_validation(self, feature_set='all', names=None, n_splits=5):
+        """Stratified k-fold mean and spread of precision, recall, F1 and ROC AUC per model."""
+        from .cv import cached_fold_ids, cross_validate
+        from .zoo import DEFAULT_MODELS
+
+        folds = cached_fold_ids(self.target, self.data.fingerprint, self.data.cache_dir,
+                                n_splits=n_splits, random_state=self.random_state)
+        summary, _ = cross_validate(self.feature_set(feature_set), self.target, folds, names or DEFAULT_MODELS,
+                                    n_jobs=self.n_jobs, balance=self.balance, random_state=self.random_state)
+        print('%d-fold stratified cross-validation (%s features)' % (n_splits, feature_set))
+        print(summary.to_string(float_format='%.4f'))
+        return summary
+
+    def evaluate(self):
+        """Fit the scikit-learn models and print one comparison table."""
+        svm_name = 'svm_approx' if self.svm_mode == 'approx' else 'svm'
+        for name, stage in (('logistic_regression', self.logistic_regression), (svm_name, self.svm),
+                            ('random_forest', self.random_forest), ('naive_bayes', self.naive_bayes)):
+            if name not in self.metrics:
+                stage()
+        print('%-20s %9s %9s %9s %9s %9s' % ('model', 'accuracy', 'precision', 'recall', 'f1', 'roc_auc'))
+        for name, metrics in self.metrics.items():
+            print('%-20s %9.4f %9.4f %9.4f %9.4f %9.4f' % (name, metrics['accuracy'], metrics['precision'],
+                                                          metrics['recall'], metrics['f1'], metrics['roc_auc']))
+        return self.metrics
+
+    def report(self, feature_set='all', names=None):
+        """Write every chart to ``plot_dir``, each drawn from aggregates rather than raw rows.
+
+        The class counts and the Amount histogram come from streamed counts,
+        the heatmap from the correlation matrix, the importances from the
+        rankings, and each model's ROC curve and confusion matrix from its
+        curve points and counts. ``names`` defaults to the models fitted so
+        far, or logistic regression, random forest and naive Bayes. Models
+        already fitted are charted on their own feature set, the others are
+        fitted on ``feature_set``.
+        """
+        from . import plots
+
+        names = names or list(self.feature_sets) or ['logistic_regression', 'random_forest', 'naive_bayes']
+        charts = self.charts
+        with self.profiler.stage('aggregates'):
+            charts.submit('class_counts', plots.plot_class_counts, self.statistics.class_count_dict())
+            charts.submit('amount_histogram', plots.plot_amount_histogram, *self.amount_histogram())
+            charts.submit('correlation', plots.plot_correlation_heatmap, self.correlation_matrix)
+            charts.submit('feature_importances', plots.plot_feature_importances,
+                          self.rankings['extra_trees'].iloc[:self.k], k=self.k)
+        curves = {}
+        for name in map(self.model_name, names):
+            self.fitted(name, self.feature_sets.get(name, feature_set))
+            charts.submit('confusion_matrix_%s' % name, plots.plot_confusion_matrix,
+                          self.metrics[name]['confusion_matrix'], title='Confusion Matrix (%s)' % name)
+            curves[name] = self.roc_curve(name)
+        charts.submit('roc_curves', plots.plot_roc_curves, curves)
+        with self.profiler.stage('render'):
+            paths = charts.wait()
+        print('Wrote %d charts to %s' % (len(paths), self.plot_dir))
+        return paths
+
+    def validate(self, n=1000, holdout=None, model_path=None):
+        """The notebook's check on ``n`` sampled rows, or with ``holdout`` a full pass over that file.
+
+        The holdout is scored against ``model_path``, else the newest random
+        forest in the artifact store, or one fitted here if none is stored.
+        """
+        if holdout is not None:
+            return self.validate_holdout(holdout, model_path=model_path)
+        from .validation import validate
+
+        # The sampled rows carry the plain features.
+        model = self.fitted('random_forest', 'all')
+        with self.profiler.stage('validation', rows=min(n, len(self.frame))):
+            metrics = validate(model, self.frame, n=n, random_state=222)
+        print('Validation on %d rows' % min(n, len(self.frame)))
+        evaluation.print_metrics(metrics)
+        if self.plots:
+            from . import plots
+
+            self.charts.submit('confusion_matrix_validation', plots.plot_confusion_matrix,
+                               metrics['confusion_matrix'], title='Confusion Matrix (validation)')
+        return metrics
+
+    def validate_holdout(self, holdout, model_path=None):
+        import shutil
+        import tempfile
+
+        from .validation import validate_file
+
+        tmp_dir = None
+        if model_path is None:
+            manifest = self.artifacts.latest('random_forest') if self.artifacts is not None else None
+            if manifest is not None:
+                model_path = self.artifacts.model_path(manifest)
+            else:
+                # Nothing stored: fit here (which saves to an empty store) and score a temporary dump.
+                model = self.models['random_forest'] if 'random_forest' in self.models else self.random_forest()[0]
+                tmp_dir = tempfile.mkdtemp(prefix='fraud-validate-')
+                model_path = models.save_model(model, tmp_dir + '/random_forest')
+        try:
+            with self.profiler.stage('validation') as record:
+                metrics = validate_file(model_path, holdout, n_jobs=self.n_jobs)
+                record['rows'] = metrics['rows']
+        finally:
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        print('Validation on %d rows of %s: %.0f rows/sec (%.1f s, %.1f s loading)'
+              % (metrics['rows'], holdout, metrics['rows_per_sec'], metrics['seconds'], metrics['load_seconds']))
+        evaluation.print_metrics(metrics)
+        if self.plots:
+            from . import plots
+
+            self.charts.submit('confusion_matrix_validation', plots.plot_confusion_matrix,
+                               metrics['confusion_matrix'], title='Confusion Matrix (validation)')
+        return metrics
@@ -0,0 +1,175 @@
+"""Charts from the notebook, drawn from precomputed aggregates and written to image files.
+
+The notebook handed every raw row to seaborn and blocked on ``plt.show()``.
+Here each chart takes a small summary instead: class counts, histogram bin
+counts, the correlation matrix, a ranking, curve points or a confusion
+matrix. It returns a matplotlib Figure on the non-interactive Agg canvas,
+so nothing needs a display and pyplot's global state is never touched.
+
+``ChartWriter`` renders and saves the figures on a background thread while
+the stages carry on. matplotlib is imported on first use.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .data import CHUNKSIZE
+
+
+def _figure(figsize=(8, 6)):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure, figure.add_subplot()
+
+
+def histogram(chunks, lower, upper, bins=50):
+    """(counts, edges) of the values in ``chunks`` over ``bins`` equal bins spanning [lower, upper]."""
+    edges = np.linspace(lower, upper, bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for values in chunks:
+        counts += np.histogram(values, bins=edges)[0]
+    return counts, edges
+
+
+def column_histogram(cache, column, lower, upper, bins=50, chunksize=CHUNKSIZE):
+    """histogram() of one column of a ColumnarCache, read ``chunksize`` rows at a time."""
+    values = cache[column]
+    chunks = (values[start:start + chunksize] for start in range(0, len(values), chunksize))
+    return histogram(chunks, lower, upper, bins=bins)
+
+
+def thin_curve(x, y, max_points=500):
+    """At most ``max_points`` of a curve's points, evenly spaced along it, keeping both ends."""
+    x, y = np.asarray(x), np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    keep = np.unique(np.linspace(0, len(x) - 1, max_points).round().astype(int))
+    return x[keep], y[keep]
+
+
+def plot_class_counts(class_counts):
+    """Bar chart of rows per class; ``class_counts`` maps label to count."""
+    figure, ax = _figure()
+    ax.bar([str(label) for label in class_counts], list(class_counts.values()))
+    ax.set_xlabel('Class')
+    ax.set_ylabel('Amount')
+    return figure
+
+
+def plot_amount_histogram(counts, edges):
+    """Histogram of Amount from histogram()'s bin counts and edges."""
+    figure, ax = _figure()
+    ax.stairs(counts, edges, fill=True)
+    ax.set_title('Distribution of CreditCard DisbursedAmounts')
+    ax.set_xlabel('Disbursement Values')
+    ax.set_ylabel('Volumes')
+    return figure
+
+
+def plot_correlation_heatmap(correlation):
+    figure, ax = _figure(figsize=(40, 20))
+    image = ax.imshow(correlation.to_numpy(), cmap='coolwarm', vmin=-1, vmax=1, aspect='auto')
+    figure.colorbar(image, ax=ax)
+    ax.set_xticks(range(len(correlation.columns)), correlation.columns, rotation=90)
+    ax.set_yticks(range(len(correlation.columns)), correlation.columns)
+    for (i, j), value in np.ndenumerate(correlation.to_numpy()):
+        ax.annotate('%.2f' % value, xy=(j, i), ha='center', va='center', fontsize=8)
+    return figure
+
+
+def plot_feature_importances(importances, k=10):
+    """Bar chart of the top ``k`` entries of a ranking Series."""
+    top = importances.iloc[:k]
+    figure, ax = _figure(figsize=(10, 6))
+    ax.bar(top.index, top.values)
+    ax.tick_params(axis='x', labelrotation=65)
+    ax.set_xlabel('Features')
+    ax.set_ylabel('Feature Importance')
+    ax.set_title('Top %d Features - ExtraTreeClassifier Model' % k)
+    figure.tight_layout()
+    return figure
+
+
+def plot_class_distribution(distribution):
+    figure, ax = _figure()
+    ax.bar([str(label) for label in distribution], list(distribution.values()))
+    ax.set_xlabel('Class')
+    ax.set_ylabel('Count')
+    ax.set_title('Class Distribution after Oversampling')
+    return figure
+
+
+def plot_roc_curves(curves):
+    """ROC curves of several models; ``curves`` maps a label to (fpr, tpr, auc)."""
+    figure, ax = _figure()
+    for label, (fpr, tpr, roc_auc) in curves.items():
+        ax.plot(*thin_curve(fpr, tpr), lw=2, label='%s (area = %0.2f)' % (label, roc_auc))
+    ax.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
+    ax.set_xlim([0.0, 1.0])
+    ax.set_ylim([0.0, 1.05])
+    ax.set_xlabel('False Positive Rate')
+    ax.set_ylabel('True Positive Rate')
+    ax.set_title('Receiver Operating Characteristic(ROC) Curve')
+    ax.legend(loc='lower right')
+    return figure
+
+
+def plot_roc_curve(fpr, tpr, roc_auc):
+    return plot_roc_curves({'ROC curve': (fpr, tpr, roc_auc)})
+
+
+def plot_confusion_matrix(conf_mat, title='Confusion Matrix'):
+    conf_mat = np.asarray(conf_mat)
+    figure, ax = _figure()
+    image = ax.imshow(conf_mat, cmap='Greens', interpolation='none')
+    figure.colorbar(image, ax=ax)
+    ax.set_xticks([0, 1], ['Class 0', 'Class 1'])
+    ax.set_yticks([0, 1], ['Class 0', 'Class 1'])
+    ax.set_xlabel('Predicted Label')
+    ax.set_ylabel('True Label')
+    ax.set_title(title)
+    for (i, j), count in np.ndenumerate(conf_mat):
+        ax.annotate(str(count), xy=(j, i), ha='center', va='center')
+    return figure
+
+
+class ChartWriter:
+    """Saves charts to ``directory`` from one background thread, so stages never wait on rendering.
+
+    ``submit(name, plot, *args)`` queues ``plot(*args)`` and returns a
+    future of the written path. One thread draws every figure, in order.
+    """
+
+    def __init__(self, directory='plots', fmt='png', dpi=100):
+        self.directory = directory
+        self.format = fmt
+        self.dpi = dpi
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='charts')
+        self._futures = []
+
+    def submit(self, name, plot, *args, **kwargs):
+        future = self._pool.submit(self._render, name, plot, args, kwargs)
+        self._futures.append(future)
+        return future
+
+    def _render(self, name, plot, args, kwargs):
+        figure = plot(*args, **kwargs)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, '%s.%s' % (name, self.format))
+        figure.savefig(path, dpi=self.dpi)
+        return path
+
+    def wait(self):
+        """Paths of the charts submitted so far, once written; re-raises a chart's rendering error."""
+        futures, self._futures = self._futures, []
+        return [future.result() for future in futures]
+
+    def close(self):
+        paths = self.wait()
+        self._pool.shutdown()
+        return paths
@@ -0,0 +1,81 @@
+"""Oversampling of the minority (fraud) class.
+
+RandomOverSampler copies fraud rows until both classes have the same count,
+which nearly doubles the training matrix. The index-based functions below
+describe the same resampling without copying any features. They return either
+the resampled row indices or per-row sample weights over the original data,
+and a lazy generator serves batches of the resampled rows to the CNN.
+"""
+
+import numpy as np
+
+
+def oversample(features, target, random_state=None):
+    """Randomly duplicate fraud rows until both classes have the same count."""
+    from imblearn.over_sampling import RandomOverSampler
+
+    oversampler = RandomOverSampler(sampling_strategy='minority', random_state=random_state)
+    return oversampler.fit_resample(features, target)
+
+
+def class_distribution(target):
+    """Mapping of class label to row count."""
+    unique, counts = np.unique(np.asarray(target), return_counts=True)
+    return {int(label): int(count) for label, count in zip(unique, counts)}
+
+
+def oversample_indices(target, random_state=None):
+    """Row indices of a minority-oversampled dataset, as RandomOverSampler would draw it.
+
+    Every row appears once, and the minority class is topped up with rows
+    drawn with replacement until it matches the majority count. The indices
+    are sorted so that gathering rows walks memory forwards.
+    """
+    target = np.asarray(target).ravel()
+    labels, counts = np.unique(target, return_counts=True)
+    minority = labels[np.argmin(counts)]
+    minority_rows = np.flatnonzero(target == minority)
+    rng = np.random.default_rng(random_state)
+    extra = rng.choice(minority_rows, size=counts.max() - counts.min(), replace=True)
+    return np.sort(np.concatenate([np.arange(len(target)), extra]))
+
+
+def index_weights(indices, n_rows):
+    """Per-row weights equal to how often each row occurs in ``indices``."""
+    return np.bincount(indices, minlength=n_rows).astype(np.float64)
+
+
+def balanced_sample_weight(target):
+    """Per-row weights giving both classes the weight of the majority class.
+
+    This is the expected value of ``index_weights(oversample_indices(target))``
+    without the sampling noise.
+    """
+    target = np.asarray(target).ravel()
+    labels, inverse, counts = np.unique(target, return_inverse=True, return_counts=True)
+    return (counts.max() / counts)[inverse].astype(np.float64)
+
+
+def resampled_distribution(target, indices):
+    """Class counts of the resampled dataset described by ``indices``."""
+    return class_distribution(np.asarray(target).ravel()[indices])
+
+
+def iter_batches(X, y, indices, batch_size=64, shuffle=True, random_state=None):
+    """Endless generator of (X, y) batches over the rows in ``indices``.
+
+    One pass over ``indices`` is an epoch; only one batch of rows is copied
+    at a time. Use ``steps_per_epoch(indices, batch_size)`` steps per epoch.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y).ravel()
+    rng = np.random.default_rng(random_state)
+    while True:
+        order = rng.permutation(indices) if shuffle else indices
+        for start in range(0, len(order), batch_size):
+            rows = np.sort(order[start:start + batch_size])
+            yield X[rows], y[rows]
+
+
+def steps_per_epoch(indices, batch_size=64):
+    return -(-len(indices) // batch_size)
@@ -0,0 +1,347 @@
+"""Local real-time scoring server with micro-batching.
+
+The model is loaded once. Concurrent requests are queued and a single batcher
+task gathers them into one ``predict_proba`` call, waiting at most
+``max_delay`` seconds after the first queued request (or until
+``max_batch_size`` rows are waiting). This amortises the per-call overhead of
+the forest over many authorisations while bounding the added latency.
+
+The protocol is a minimal HTTP/1.1 over TCP or a Unix socket, built on asyncio
+streams only, so the server runs offline with no web framework:
+
+``POST /score``  body ``{"rows": [[Time, V1, ..., Amount], ...]}`` or
+                 ``{"transactions": [{"Time": ..., "V1": ..., ...}, ...]}``;
+                 answers ``{"probabilities": [...]}``.
+``GET /stats``   latency percentiles and throughput counters.
+
+Models trained with the velocity feature set get those features from a
+``VelocityState`` that the server updates with every transaction in arrival
+order, so requests carry only the raw columns.
+"""
+
+import asyncio
+import json
+import time
+import warnings
+from collections import deque
+
+import numpy as np
+
+from .velocity import VelocityState, windows_from_columns
+
+MAX_DELAY = 0.002
+MAX_BATCH_SIZE = 1024
+LATENCY_WINDOW = 100_000
+
+
+class LatencyStats:
+    """Counters plus a window of recent request latencies."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.perf_counter()
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.batch_rows = 0
+
+    def record_request(self, latency, rows):
+        self.latencies.append(latency)
+        self.requests += 1
+        self.rows += rows
+
+    def record_batch(self, rows):
+        self.batches += 1
+        self.batch_rows += rows
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = np.fromiter(self.latencies, dtype=np.float64, count=len(self.latencies))
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if len(latencies) else (None, None)
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'mean_batch_rows': self.batch_rows / self.batches if self.batches else 0.0,
+            'latency_p50_ms': p50,
+            'latency_p99_ms': p99,
+            'requests_per_sec': self.requests / elapsed,
+            'rows_per_sec': self.rows / elapsed,
+            'uptime_sec': elapsed,
+        }
+
+
+class MicroBatcher:
+    """Collects scoring requests and runs them through the model in batches."""
+
+    def __init__(self, model, max_delay=MAX_DELAY, max_batch_size=MAX_BATCH_SIZE, stats=None):
+        self.model = model
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self.stats = stats or LatencyStats()
+        self.columns = list(getattr(model, 'feature_names_in_', []))
+        windows = windows_from_columns(self.columns)
+        self.velocity = VelocityState(windows) if windows else None
+        # Columns a request supplies; velocity features are derived from Time and Amount.
+        self.raw_columns = [column for column in self.columns
+                            if self.velocity is None or column not in self.velocity.columns]
+        # Values per request row, or None if the model does not say.
+        self.width = len(self.raw_columns) if self.columns else getattr(model, 'n_features_in_', None)
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def score(self, rows):
+        """Fraud probability for each row of a 2-D float32 array."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rows, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = loop.time() + self.max_delay
+            while n_rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+            try:
+                batch = np.concatenate([rows for rows, _ in pending])
+                # The event loop keeps accepting requests while the model runs.
+                probabilities = await loop.run_in_executor(None, self._predict, batch)
+            except Exception as exc:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.stats.record_batch(len(batch))
+            start = 0
+            for rows, future in pending:
+                if not future.done():
+                    future.set_result(probabilities[start:start + len(rows)])
+                start += len(rows)
+
+    def _predict(self, batch):
+        return self.model.predict_proba(batch)[:, 1]
+
+    def parse_rows(self, payload):
+        if 'rows' in payload:
+            rows = np.asarray(payload['rows'], dtype=np.float32)
+        elif 'transactions' in payload:
+            if not self.columns:
+                raise ValueError('the model has no feature names; send "rows" instead')
+            rows = np.array([[record[column] for column in self.raw_columns]
+                             for record in payload['transactions']], dtype=np.float32)
+        else:
+            raise ValueError('expected "rows" or "transactions"')
+        width = self.width
+        if rows.ndim != 2 or (width is not None and rows.shape[1] != width):
+            raise ValueError('expected rows of %s features' % width if width is not None else 'expected 2-D rows')
+        if self.velocity is not None:
+            rows = self.add_velocity(rows)
+        return rows
+
+    def add_velocity(self, rows):
+        """Append the velocity features of each row, updating the windows in arrival order."""
+        time, amount = self.raw_columns.index('Time'), self.raw_columns.index('Amount')
+        velocity = np.array([self.velocity.update(row[time], row[amount]) for row in rows], dtype=np.float32)
+        velocity = velocity.reshape(len(rows), len(self.velocity.columns))
+        frame = dict(zip(self.raw_columns, rows.T))
+        frame.update(zip(self.velocity.columns, velocity.T))
+        return np.column_stack([frame[column] for column in self.columns]).astype(np.float32)
+
+
+def prepare_model(model):
+    """Tune a fitted scikit-learn model for single-request latency."""
+    if hasattr(model, 'n_jobs'):
+        # Joblib dispatch costs more than it saves on batches of a few rows.
+        model.n_jobs = 1
+    # Requests arrive as plain arrays; the feature-name check would warn on every batch.
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    return model
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+
+def _response(status, body, keep_alive):
+    payload = json.dumps(body).encode()
+    head = ('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n'
+            'Connection: %s\r\n\r\n' % (status, _REASONS[status], len(payload),
+                                        'keep-alive' if keep_alive else 'close'))
+    return head.encode() + payload
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, version = request_line.decode('latin-1').split()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+    return method, target, body, keep_alive
+
+
+class ScoringServer:
+
+    def __init__(self, model, max_delay=MAX_DELAY, max_batch_size=MAX_BATCH_SIZE):
+        self.batcher = MicroBatcher(prepare_model(model), max_delay=max_delay, max_batch_size=max_batch_size)
+        self.stats = self.batcher.stats
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError):
+                    writer.write(_response(400, {'error': 'malformed request'}, False))
+                    break
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                writer.write(await self.dispatch(method, target, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body, keep_alive):
+        if target == '/stats':
+            return _response(200, self.stats.snapshot(), keep_alive)
+        if target != '/score':
+            return _response(404, {'error': 'unknown path %s' % target}, keep_alive)
+        if method != 'POST':
+            return _response(405, {'error': 'use POST'}, keep_alive)
+        started = time.perf_counter()
+        try:
+            rows = self.batcher.parse_rows(json.loads(body))
+        except (ValueError, KeyError, TypeError) as exc:
+            return _response(400, {'error': str(exc)}, keep_alive)
+        try:
+            probabilities = await self.batcher.score(rows)
+        except Exception as exc:
+            return _response(500, {'error': '%s: %s' % (type(exc).__name__, exc)}, keep_alive)
+        self.stats.record_request(time.perf_counter() - started, len(rows))
+        return _response(200, {'probabilities': probabilities.tolist()}, keep_alive)
+
+    async def serve(self, host='127.0.0.1', port=8000, unix_socket=None, ready=None):
+        """Serve until cancelled. ``ready`` is an optional Event set once listening."""
+        self.batcher.start()
+        if unix_socket:
+            server = await asyncio.start_unix_server(self.handle, path=unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def serve(model_path, host='127.0.0.1', port=8000, unix_socket=None, max_delay=MAX_DELAY,
+          max_batch_size=MAX_BATCH_SIZE):
+    """Load the persisted model once and serve it until interrupted."""
+    from .models import load_model
+
+    server = ScoringServer(load_model(model_path), max_delay=max_delay, max_batch_size=max_batch_size)
+    print('Serving %s on %s' % (model_path, unix_socket or '%s:%d' % (host, port)))
+    try:
+        asyncio.run(server.serve(host=host, port=port, unix_socket=unix_socket))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _client_requests(host, port, unix_socket, body, n_requests, latencies):
+    if unix_socket:
+        reader, writer = await asyncio.open_unix_connection(unix_socket)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    request = ('POST /score HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n'
+               'Content-Length: %d\r\n\r\n' % (host, len(body))).encode() + body
+    try:
+        for _ in range(n_requests):
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def _read_response(reader):
+    await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return await reader.readexactly(length)
+
+
+def load_test(host='127.0.0.1', port=8000, unix_socket=None, concurrency=32, requests=200, model_path=None,
+              n_features=None, random_state=0):
+    """Drive a running server from ``concurrency`` keep-alive clients scoring one row each.
+
+    Rows have ``n_features`` values, by default as many as the served model
+    at ``model_path`` takes per request. Returns client-side latency
+    percentiles (ms) and the achieved request rate.
+    """
+    if n_features is None:
+        from .models import load_model
+
+        if model_path is None:
+            raise ValueError('load_test needs model_path or n_features')
+        n_features = MicroBatcher(load_model(model_path, mmap_mode='r')).width
+        if n_features is None:
+            raise ValueError('%s does not record its number of features; pass n_features' % model_path)
+    rng = np.random.default_rng(random_state)
+    body = json.dumps({'rows': rng.normal(size=(1, n_features)).tolist()}).encode()
+    latencies = []
+
+    async def run():
+        await asyncio.gather(*(_client_requests(host, port, unix_socket, body, requests, latencies)
+                               for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {'requests': len(latencies), 'latency_p50_ms': p50, 'latency_p99_ms': p99,
+            'requests_per_sec': len(latencies) / elapsed}
@@ -0,0 +1,122 @@
+"""Content-addressed cache of stage outputs, so reruns only redo what changed.
+
+The pipeline's steps form a DAG: the data feeds the statistics, the
+correlation and the rankings; a feature set and the data feed a split; a
+split feeds each model's fit and metrics. Every node has a key hashed from:
+
+* its name and parameters;
+* the source code of the functions that compute it;
+* the keys of the nodes it depends on.
+
+Keys chain like a Merkle tree. Editing fit_naive_bayes changes only the
+naive Bayes key, while a new csv changes the data fingerprint and with it
+every key downstream.
+
+Outputs are stored with joblib under ``<root>/<key>/``. The directory's
+modification time is refreshed on every hit, and when the cache grows
+past ``max_bytes`` the least recently used entries are evicted first.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+
+from .artifacts import _jsonable
+
+MAX_BYTES = 2 * 2 ** 30
+ENTRY = 'entry.json'
+
+
+def code_hash(*functions):
+    """Hash of the source of ``functions``; editing any of them changes it."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for function in functions:
+        try:
+            source = inspect.getsource(function)
+        except (OSError, TypeError):
+            source = repr(getattr(function, '__code__', function))
+        hasher.update(source.encode())
+    return hasher.hexdigest()
+
+
+def stage_key(name, params=None, code=(), inputs=()):
+    """Key of a DAG node from its name, parameters, code and the keys of its inputs."""
+    payload = json.dumps([name, _jsonable(params or {}), code_hash(*code), list(inputs)], sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+class StageCache:
+
+    def __init__(self, root, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """(True, value) for a stored key, else (False, None)."""
+        import joblib
+
+        path = self._path(key)
+        if not os.path.isfile(os.path.join(path, ENTRY)):
+            self.misses += 1
+            return False, None
+        value = joblib.load(os.path.join(path, 'value.joblib'))
+        os.utime(path)
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value, name=None):
+        import joblib
+
+        path = self._path(key)
+        tmp_path = '%s.tmp-%d' % (path, os.getpid())
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        joblib.dump(value, os.path.join(tmp_path, 'value.joblib'))
+        with open(os.path.join(tmp_path, ENTRY), 'w') as fh:
+            json.dump({'key': key, 'name': name, 'created': time.time(), 'bytes': _size(tmp_path)}, fh)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self.evict()
+        return value
+
+    def cached(self, key, compute, name=None):
+        """The stored value for ``key``, or ``compute()`` stored under it."""
+        hit, value = self.get(key)
+        return value if hit else self.put(key, compute(), name=name)
+
+    def entries(self):
+        """(last used, bytes, key) of every entry, least recently used first."""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for key in os.listdir(self.root):
+            path = self._path(key)
+            entry = os.path.join(path, ENTRY)
+            if os.path.isfile(entry):
+                with open(entry) as fh:
+                    size = json.load(fh)['bytes']
+                entries.append((os.path.getmtime(path), size, key))
+        return sorted(entries)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in ``max_bytes``."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+        return total
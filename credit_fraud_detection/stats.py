@@ -0,0 +1,119 @@
+"""Single-pass summary statistics over chunks of rows.
+
+Replaces ``Data.describe()``, the ``groupby('Class')`` count and the
+Fraud_Cases / Non_Fraudulent copies of the notebook. Moments are merged chunk
+by chunk in float64 (Chan et al.), so memory does not grow with the file.
+Quantiles come from a fixed-size bottom-k random sample; they are exact while
+the data has no more rows than the sample size and approximate beyond that.
+"""
+
+import numpy as np
+
+QUANTILES = (0.25, 0.5, 0.75)
+SAMPLE_SIZE = 100_000
+
+
+class StreamingStats:
+
+    def __init__(self, columns, sample_size=SAMPLE_SIZE, random_state=None):
+        self.columns = list(columns)
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(random_state)
+        n_columns = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self._m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+        self.class_counts = np.zeros(2, dtype=np.int64)
+        self._sample = np.empty((0, n_columns))
+        self._keys = np.empty(0)
+
+    def update(self, chunk):
+        """Add a chunk: a DataFrame or a mapping of column name to array."""
+        values = np.column_stack([np.asarray(chunk[column], dtype=np.float64) for column in self.columns])
+        n = len(values)
+        if n == 0:
+            return self
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        self._merge_moments(n, mean, m2, values.min(axis=0), values.max(axis=0))
+        if 'Class' in self.columns:
+            labels = values[:, self.columns.index('Class')].astype(np.int64)
+            counts = np.bincount(labels, minlength=len(self.class_counts))
+            self._add_class_counts(counts)
+        self._merge_sample(values, self._rng.random(n))
+        return self
+
+    def merge(self, other):
+        """Fold in the statistics of another StreamingStats over the same columns."""
+        if other.columns != self.columns:
+            raise ValueError('cannot merge statistics over different columns')
+        if other.count:
+            self._merge_moments(other.count, other.mean, other._m2, other.min, other.max)
+            self._add_class_counts(other.class_counts)
+            self._merge_sample(other._sample, other._keys)
+        return self
+
+    def _merge_moments(self, n, mean, m2, minimum, maximum):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self._m2 = self._m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+
+    def _add_class_counts(self, counts):
+        if len(counts) > len(self.class_counts):
+            counts, self.class_counts = self.class_counts, counts.copy()
+        self.class_counts[:len(counts)] += counts
+
+    def _merge_sample(self, values, keys):
+        # Keeping the rows with the smallest random keys is a uniform sample
+        # of everything seen so far, and two such samples merge the same way.
+        sample = np.concatenate([self._sample, values])
+        keys = np.concatenate([self._keys, keys])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            sample, keys = sample[keep], keys[keep]
+        self._sample, self._keys = sample, keys
+
+    def variance(self, ddof=1):
+        if self.count <= ddof:
+            return np.full(len(self.columns), np.nan)
+        return self._m2 / (self.count - ddof)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.variance(ddof))
+
+    def quantiles(self, q=QUANTILES):
+        """Array of shape (len(q), n_columns); linear interpolation like pandas."""
+        if not len(self._sample):
+            return np.full((len(q), len(self.columns)), np.nan)
+        return np.quantile(self._sample, q, axis=0)
+
+    @property
+    def exact_quantiles(self):
+        return self.count <= self.sample_size
+
+    def class_count_dict(self):
+        return {label: int(count) for label, count in enumerate(self.class_counts)}
+
+    def describe(self, q=QUANTILES):
+        """DataFrame laid out like ``DataFrame.describe()``."""
+        import pandas as pd
+
+        rows = [np.full(len(self.columns), float(self.count)), self.mean, self.std(), self.min]
+        rows.extend(self.quantiles(q))
+        rows.append(self.max)
+        index = ['count', 'mean', 'std', 'min'] + ['%g%%' % (100 * p) for p in q] + ['max']
+        return pd.DataFrame(rows, index=index, columns=self.columns)
+
+
+def compute_stats(chunks, columns, sample_size=SAMPLE_SIZE, random_state=None):
+    """Run StreamingStats over an iterable of chunks."""
+    stats = StreamingStats(columns, sample_size=sample_size, random_state=random_state)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
@@ -0,0 +1,184 @@
+"""Fixed-memory ROC and PR curves for large score logs.
+
+``AUCAccumulator`` keeps one histogram of scores per class over a fixed
+range, so months of scored traffic take ``2 * n_bins`` counters no matter
+how many rows go in. Accumulators from different shards or processes merge
+by adding their histograms.
+
+Scores in the same bin cannot be ordered, so results carry error bounds
+that hold for any ordering inside the bins:
+
+* ROC AUC counts same-bin (fraud, genuine) pairs as half right. The true
+  value is within ``0.5 * sum(pos_b * neg_b) / (P * N)`` of the estimate.
+* PR AUC (average precision) treats each bin as a tie, as scikit-learn
+  does for equal scores. The true value lies between the results of
+  ranking each bin's fraud rows after or before its genuine rows.
+
+Finer bins narrow both bounds. Scores outside ``score_range`` are clipped
+into the first or last bin.
+"""
+
+import os
+
+import numpy as np
+
+N_BINS = 16384
+
+
+class AUCAccumulator:
+
+    def __init__(self, n_bins=N_BINS, score_range=(0.0, 1.0)):
+        self.n_bins = n_bins
+        self.score_range = (float(score_range[0]), float(score_range[1]))
+        self.counts = np.zeros((2, n_bins), dtype=np.int64)
+
+    def update(self, scores, labels):
+        """Add a batch of scores with their 0/1 labels."""
+        scores = np.asarray(scores, dtype=np.float64).ravel()
+        labels = np.asarray(labels).ravel().astype(np.int64)
+        low, high = self.score_range
+        bins = np.floor((scores - low) * (self.n_bins / (high - low))).astype(np.int64)
+        np.clip(bins, 0, self.n_bins - 1, out=bins)
+        self.counts += np.bincount(labels * self.n_bins + bins, minlength=2 * self.n_bins).reshape(2, -1)
+        return self
+
+    def merge(self, other):
+        if other.n_bins != self.n_bins or other.score_range != self.score_range:
+            raise ValueError('cannot merge accumulators with different bins')
+        self.counts += other.counts
+        return self
+
+    def save(self, path):
+        """Write the histograms to an .npz file that load() or accumulate_logs() can read back."""
+        np.savez(path, counts=self.counts, score_range=np.asarray(self.score_range))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            accumulator = cls(data['counts'].shape[1], tuple(data['score_range']))
+            accumulator.counts[:] = data['counts']
+        return accumulator
+
+    @property
+    def n_positive(self):
+        return int(self.counts[1].sum())
+
+    @property
+    def n_negative(self):
+        return int(self.counts[0].sum())
+
+    def _descending(self):
+        """Per-bin (negatives, positives) and cumulative counts, highest scores first."""
+        negatives = self.counts[0, ::-1]
+        positives = self.counts[1, ::-1]
+        return negatives, positives, np.cumsum(negatives), np.cumsum(positives)
+
+    def thresholds(self):
+        """Lower edge of every bin, highest first: the cut-offs of the curves."""
+        low, high = self.score_range
+        return (low + np.arange(self.n_bins) * (high - low) / self.n_bins)[::-1]
+
+    def roc_curve(self):
+        """(fpr, tpr, auc) with the (0, 0) corner prepended, for plots.plot_roc_curve."""
+        _, _, fp, tp = self._descending()
+        fpr = np.r_[0.0, fp / max(self.n_negative, 1)]
+        tpr = np.r_[0.0, tp / max(self.n_positive, 1)]
+        return fpr, tpr, self.roc_auc()
+
+    def pr_curve(self):
+        """(precision, recall, thresholds), highest threshold first; empty bins are dropped."""
+        negatives, positives, fp, tp = self._descending()
+        occupied = (negatives + positives) > 0
+        precision = tp[occupied] / (tp[occupied] + fp[occupied])
+        recall = tp[occupied] / max(self.n_positive, 1)
+        return precision, recall, self.thresholds()[occupied]
+
+    def roc_auc(self):
+        if not self.n_positive or not self.n_negative:
+            return float('nan')
+        negatives, positives, fp, _ = self._descending()
+        # A fraud row outranks every genuine row in lower bins and half of those in its own.
+        genuine_below = self.n_negative - fp
+        pairs = np.sum(positives * (genuine_below + 0.5 * negatives))
+        return float(pairs / (self.n_positive * self.n_negative))
+
+    def roc_auc_error(self):
+        """Largest possible distance between roc_auc() and the exact ROC AUC."""
+        if not self.n_positive or not self.n_negative:
+            return float('nan')
+        return float(0.5 * np.sum(self.counts[0] * self.counts[1]) / (self.n_positive * self.n_negative))
+
+    def pr_auc(self):
+        """Average precision with every bin treated as a tie."""
+        if not self.n_positive:
+            return float('nan')
+        negatives, positives, fp, tp = self._descending()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(positives > 0, tp / (tp + fp), 0.0)
+        return float(np.sum(positives * precision) / self.n_positive)
+
+    def pr_auc_bounds(self):
+        """(lower, upper) bounds on the exact average precision.
+
+        Inside a bin with ``p`` fraud and ``n`` genuine rows, and ``T`` fraud
+        and ``F`` genuine rows in higher bins, the j-th fraud row has precision
+        between (T + j) / (T + F + n + j) and (T + j) / (T + F + j). Both are
+        increasing in j, so summing p times their j = 1 and j = p values
+        bounds the bin's contribution.
+        """
+        if not self.n_positive:
+            return float('nan'), float('nan')
+        negatives, positives, fp, tp = self._descending()
+        tp_before = tp - positives
+        fp_before = fp - negatives
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lower = np.where(positives > 0, (tp_before + 1) / (tp_before + fp_before + negatives + 1), 0.0)
+            upper = np.where(positives > 0, tp / (tp_before + fp_before + positives), 0.0)
+        return (float(np.sum(positives * lower) / self.n_positive),
+                float(np.sum(positives * upper) / self.n_positive))
+
+    def summary(self):
+        lower, upper = self.pr_auc_bounds()
+        return {
+            'rows': self.n_positive + self.n_negative,
+            'fraud_rows': self.n_positive,
+            'roc_auc': self.roc_auc(),
+            'roc_auc_error': self.roc_auc_error(),
+            'pr_auc': self.pr_auc(),
+            'pr_auc_lower': lower,
+            'pr_auc_upper': upper,
+        }
+
+
+def _accumulate_file(path, score_column, label_column, n_bins, score_range, chunksize):
+    import pandas as pd
+
+    accumulator = AUCAccumulator(n_bins, score_range)
+    if path.endswith('.npz'):
+        # A saved accumulator from another shard.
+        return accumulator.merge(AUCAccumulator.load(path))
+    for chunk in pd.read_csv(path, usecols=[score_column, label_column], chunksize=chunksize):
+        accumulator.update(chunk[score_column].to_numpy(), chunk[label_column].to_numpy())
+    return accumulator
+
+
+def accumulate_logs(paths, score_column='score', label_column='Class', n_bins=N_BINS, score_range=(0.0, 1.0),
+                    chunksize=1_000_000, n_jobs=-1):
+    """One AUCAccumulator over csv score logs (or saved .npz accumulators), one process per file."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .parallel import effective_n_jobs
+
+    paths = [os.fspath(path) for path in paths]
+    result = AUCAccumulator(n_bins, score_range)
+    workers = min(len(paths), effective_n_jobs(n_jobs))
+    if workers <= 1:
+        for path in paths:
+            result.merge(_accumulate_file(path, score_column, label_column, n_bins, score_range, chunksize))
+        return result
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_accumulate_file, path, score_column, label_column, n_bins,
+                               score_range, chunksize) for path in paths]
+        for future in futures:
+            result.merge(future.result())
+    return result
@@ -0,0 +1,155 @@
+"""Synthetic transactions with the creditcard.csv schema, for benchmarks and load tests.
+
+A profile of the real data holds the fraud rate and, per class, the mean
+vector and covariance matrix of V1-V28 and Amount. It is a small JSON file,
+so data can be generated offline without the original csv. Each row gets its
+class from a Bernoulli draw at the fraud rate. Its features are then drawn
+from the multivariate normal of that class, so the per-class means and
+covariances match the profile up to sampling noise. Amount keeps the
+Gaussian's negative tail, which a clip would trade for a shifted mean.
+
+Time is the exception: it is spread evenly over the observed time span in
+non-decreasing whole seconds, as in the export, so that time-ordered
+processing still sees a stream.
+
+Rows are generated in chunks across worker processes. Each chunk has its own
+child of one SeedSequence, so the output depends only on the seed and the
+chunk size, not on the number of workers.
+"""
+
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .data import CHUNKSIZE, COLUMNS, DTYPES, FEATURE_COLUMNS, fingerprint_arrays
+from .parallel import effective_n_jobs
+
+GAUSSIAN_COLUMNS = [column for column in FEATURE_COLUMNS if column != 'Time']
+
+
+def fit_profile(cache, chunksize=CHUNKSIZE):
+    """Fraud rate, time span and per-class mean/covariance of a ColumnarCache."""
+    from .correlation import StreamingCorrelation
+
+    moments = {label: StreamingCorrelation(GAUSSIAN_COLUMNS) for label in (0, 1)}
+    time_min, time_max = np.inf, -np.inf
+    for chunk in cache.iter_chunks(chunksize):
+        target = np.asarray(chunk['Class'])
+        for label, accumulator in moments.items():
+            mask = target == label
+            if mask.any():
+                accumulator.update({column: np.asarray(chunk[column])[mask] for column in GAUSSIAN_COLUMNS})
+        time_min = min(time_min, float(np.min(chunk['Time'])))
+        time_max = max(time_max, float(np.max(chunk['Time'])))
+    n_fraud, n_rows = moments[1].count, moments[0].count + moments[1].count
+    return {
+        'columns': GAUSSIAN_COLUMNS,
+        'n_rows': n_rows,
+        'fraud_rate': n_fraud / n_rows,
+        'time_range': [time_min, time_max],
+        'classes': {str(label): {'mean': accumulator.mean.tolist(),
+                                 'covariance': accumulator.covariance().tolist()}
+                    for label, accumulator in moments.items()},
+    }
+
+
+def save_profile(profile, path):
+    with open(path, 'w') as fh:
+        json.dump(profile, fh)
+
+
+def load_profile(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _factor(covariance):
+    """Matrix square root of a covariance, tolerating the rank deficiency of a small fraud class."""
+    values, vectors = np.linalg.eigh(np.asarray(covariance))
+    return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def generate_chunk(profile, start, stop, n_rows, seed):
+    """Columns of rows [start, stop) of an ``n_rows`` dataset, as a dict of arrays in the cache dtypes."""
+    rng = np.random.default_rng(seed)
+    size = stop - start
+    target = (rng.random(size) < profile['fraud_rate']).astype(DTYPES['Class'])
+    values = np.empty((size, len(profile['columns'])))
+    for label in (0, 1):
+        rows = np.flatnonzero(target == label)
+        moments = profile['classes'][str(label)]
+        normal = rng.standard_normal((len(rows), len(profile['columns'])))
+        values[rows] = np.asarray(moments['mean']) + normal @ _factor(moments['covariance']).T
+    time_min, time_max = profile['time_range']
+    # Stratified uniform arrivals: row i lands in the i-th of n_rows equal slices of the span.
+    position = (np.arange(start, stop) + rng.random(size)) / n_rows
+    chunk = {'Time': np.floor(time_min + position * (time_max - time_min))}
+    chunk.update((column, values[:, j]) for j, column in enumerate(profile['columns']))
+    chunk['Amount'] = np.round(chunk['Amount'], 2)
+    chunk['Class'] = target
+    return {column: np.asarray(chunk[column], dtype=DTYPES[column]) for column in COLUMNS}
+
+
+def _write_chunk(profile, start, stop, n_rows, seed, output, output_format):
+    chunk = generate_chunk(profile, start, stop, n_rows, seed)
+    if output_format == 'cache':
+        for column in COLUMNS:
+            array = np.load(os.path.join(output, column + '.npy'), mmap_mode='r+')
+            array[start:stop] = chunk[column]
+            array.flush()
+        return None
+    import pandas as pd
+
+    part = '%s.part-%012d' % (output, start)
+    pd.DataFrame(chunk, columns=COLUMNS).to_csv(part, header=start == 0, index=False)
+    return part
+
+
+def generate(profile, n_rows, output, random_state=0, chunksize=CHUNKSIZE, n_jobs=-1):
+    """Write ``n_rows`` synthetic rows to ``output``.
+
+    A path ending in .csv gets a csv file; anything else becomes a columnar
+    cache directory that ``load_creditcard`` and ``ColumnarCache`` open
+    directly. Returns the path.
+    """
+    output_format = 'csv' if output.endswith('.csv') else 'cache'
+    bounds = list(range(0, n_rows, chunksize)) + [n_rows]
+    seeds = np.random.SeedSequence(random_state).spawn(len(bounds) - 1)
+    target = output + '.tmp'
+    if output_format == 'cache':
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(target)
+        for column in COLUMNS:
+            np.lib.format.open_memmap(os.path.join(target, column + '.npy'), mode='w+', dtype=DTYPES[column],
+                                      shape=(n_rows,))
+    tasks = [(profile, start, stop, n_rows, seed, target, output_format)
+             for start, stop, seed in zip(bounds[:-1], bounds[1:], seeds)]
+    workers = min(len(tasks), effective_n_jobs(n_jobs))
+    if workers <= 1:
+        parts = [_write_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_write_chunk, *zip(*tasks)))
+
+    if output_format == 'csv':
+        with open(target, 'wb') as fh:
+            for part in parts:
+                with open(part, 'rb') as source:
+                    shutil.copyfileobj(source, fh, 1 << 24)
+                os.remove(part)
+        os.replace(target, output)
+        return output
+
+    arrays = [np.load(os.path.join(target, column + '.npy'), mmap_mode='r') for column in COLUMNS]
+    meta = {'source': 'synthetic', 'random_state': random_state, 'chunksize': chunksize, 'columns': COLUMNS,
+            'n_rows': n_rows, 'fingerprint': fingerprint_arrays(arrays, names=COLUMNS),
+            'dtypes': {column: np.dtype(DTYPES[column]).str for column in COLUMNS}}
+    del arrays
+    with open(os.path.join(target, 'meta.json'), 'w') as fh:
+        json.dump(meta, fh, indent=2)
+    shutil.rmtree(output, ignore_errors=True)
+    os.replace(target, output)
+    return output
@@ -0,0 +1,192 @@
+"""Successive-halving hyperparameter search for the random forest and logistic regression.
+
+Every candidate in a model's grid is fitted on a small stratified subsample
+of the training rows and scored on a fixed validation part of them. Only the
+best 1/``factor`` of the candidates go on to the next round, which has
+``factor`` times as many rows; the last round fits on all of them. Most of
+the grid is therefore ruled out for the cost of fitting on a few percent of
+the data.
+
+The subsamples are prefixes of one stratified ordering of the rows, so each
+round's rows include the previous round's, and every prefix keeps the class
+ratio. The test split is never seen.
+
+Each round's candidates run at once in a process pool over memory-mapped
+arrays, one core each. Every score is written to a JSON checkpoint in the
+data cache as it arrives. The checkpoint is keyed by the model, grid,
+data and settings, so a killed search resumes where it stopped, and a
+finished one is not repeated.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+
+from .artifacts import _jsonable
+from .parallel import effective_n_jobs
+
+SEARCH_SPACES = {
+    'random_forest': {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 8, 16],
+        'min_samples_leaf': [1, 5],
+        'max_features': ['sqrt', 0.5],
+        'class_weight': [None, 'balanced_subsample'],
+    },
+    'logistic_regression': {
+        'C': [0.001, 0.01, 0.1, 1.0, 10.0, 100.0],
+        'class_weight': [None, 'balanced'],
+        'scale': [True],
+        'max_iter': [1000],
+    },
+}
+FACTOR = 3
+SCORING = 'pr_auc'
+
+
+def candidates(space):
+    """Every combination of a search space, in a fixed order."""
+    from sklearn.model_selection import ParameterGrid
+
+    return list(ParameterGrid(space))
+
+
+def schedule(n_candidates, n_rows, factor=FACTOR, min_rows=1000):
+    """(candidates, rows) per round; the last round uses all ``n_rows``.
+
+    Rounds stop when one candidate would be left, or earlier if the first
+    round would otherwise get fewer than ``min_rows`` rows.
+    """
+    def rounds_until(ratio):
+        return 1 + int(math.floor(math.log(ratio, factor) + 1e-9)) if ratio > 1 else 1
+
+    n_rounds = min(rounds_until(n_candidates), rounds_until(n_rows / min_rows))
+    return [(int(math.ceil(n_candidates / factor ** i)), n_rows // factor ** (n_rounds - 1 - i))
+            for i in range(n_rounds)]
+
+
+def stratified_order(y, random_state=42):
+    """A permutation of the rows whose every prefix has (about) the class ratio of ``y``."""
+    rng = np.random.default_rng(random_state)
+    y = np.asarray(y)
+    keys = np.empty(len(y))
+    for label in np.unique(y):
+        rows = np.flatnonzero(y == label)
+        keys[rows] = (rng.permutation(len(rows)) + 0.5) / len(rows)
+    return np.argsort(keys, kind='stable')
+
+
+def _score_worker(name, params, n_rows, array_dir, balance, random_state, scoring):
+    from threadpoolctl import threadpool_limits
+
+    from . import models, sampling
+    from .evaluation import evaluate
+    from .zoo import _fit_function
+
+    X, y, fit_rows, validation_rows = (np.load(os.path.join(array_dir, array + '.npy'), mmap_mode='r')
+                                       for array in ('X', 'y', 'fit_rows', 'validation_rows'))
+    rows = np.sort(fit_rows[:n_rows])
+    X_fit, y_fit = X[rows], y[rows]
+    params = dict(params)
+    if name == 'random_forest':
+        params.update(n_jobs=1, random_state=random_state)
+    if balance == 'weights':
+        params['sample_weight'] = sampling.balanced_sample_weight(y_fit)
+    elif balance == 'indices':
+        indices = sampling.oversample_indices(y_fit, random_state=random_state)
+        params['sample_weight'] = sampling.index_weights(indices, len(y_fit))
+    with threadpool_limits(limits=1):
+        model = _fit_function(name)(X_fit, y_fit, **params)
+        X_validation, y_validation = X[validation_rows], y[validation_rows]
+        metrics = evaluate(y_validation, models.predict_classes(model, X_validation),
+                           models.predict_scores(model, X_validation))
+    return float(metrics[scoring])
+
+
+def _checkpoint_key(name, space, fingerprint, columns, settings):
+    payload = json.dumps([name, _jsonable(space), fingerprint, list(columns), _jsonable(settings)], sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _save_checkpoint(path, state):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def successive_halving(name, X, y, fingerprint=None, checkpoint_dir=None, space=None, factor=FACTOR,
+                       min_rows=1000, validation_size=0.25, scoring=SCORING, balance='none', n_jobs=-1,
+                       random_state=42, verbose=True):
+    """Search ``space`` (default SEARCH_SPACES[name]) and return the winner and the history.
+
+    Returns a dict with 'best_params', 'best_score', 'scoring' and
+    'rounds': per round the rows used and every candidate's score. Scores
+    are evaluate()'s ``scoring`` metric on a stratified ``validation_size``
+    share of the rows. With ``checkpoint_dir`` progress is saved there and
+    an interrupted search with the same inputs resumes.
+    """
+    from .models import split
+    from .zoo import write_arrays
+
+    space = space or SEARCH_SPACES[name]
+    grid = candidates(space)
+    y = np.asarray(y).ravel()
+    fit_rows, validation_rows, _, _ = split(np.arange(len(y)), y, test_size=validation_size,
+                                            random_state=random_state)
+    fit_rows = fit_rows[stratified_order(y[fit_rows], random_state=random_state)]
+    rounds = schedule(len(grid), len(fit_rows), factor=factor, min_rows=min_rows)
+    settings = {'factor': factor, 'min_rows': min_rows, 'validation_size': validation_size, 'scoring': scoring,
+                'balance': balance, 'random_state': random_state, 'rows': len(y), 'schedule': rounds}
+
+    path, state = None, {'rounds': []}
+    if checkpoint_dir is not None:
+        key = _checkpoint_key(name, space, fingerprint, getattr(X, 'columns', []), settings)
+        path = os.path.join(checkpoint_dir, 'tuning-%s-%s.json' % (name, key))
+        if os.path.exists(path):
+            with open(path) as fh:
+                state = json.load(fh)
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    survivors = list(range(len(grid)))
+    array_dir = tempfile.mkdtemp(prefix='fraud-tune-')
+    try:
+        write_arrays(array_dir, X=np.asarray(X, dtype=np.float32), y=y, fit_rows=fit_rows,
+                     validation_rows=validation_rows)
+        for number, (n_candidates, n_rows) in enumerate(rounds):
+            if number == len(state['rounds']):
+                state['rounds'].append({'rows': n_rows, 'scores': {}})
+            scores = state['rounds'][number]['scores']
+            pending = [index for index in survivors if str(index) not in scores]
+            if pending:
+                workers = min(len(pending), effective_n_jobs(n_jobs))
+                with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+                    futures = {pool.submit(_score_worker, name, grid[index], n_rows, array_dir, balance,
+                                           random_state, scoring): index for index in pending}
+                    for future in as_completed(futures):
+                        scores[str(futures[future])] = future.result()
+                        if path is not None:
+                            _save_checkpoint(path, state)
+            ranked = sorted(survivors, key=lambda index: (-np.nan_to_num(scores[str(index)], nan=-np.inf), index))
+            if verbose:
+                best = ranked[0]
+                print('%s round %d: %d candidates on %d rows, best %s %.4f %s'
+                      % (name, number + 1, len(survivors), n_rows, scoring, scores[str(best)], grid[best]))
+            if number + 1 < len(rounds):
+                survivors = ranked[:rounds[number + 1][0]]
+    finally:
+        shutil.rmtree(array_dir, ignore_errors=True)
+
+    best = ranked[0]
+    history = [{'rows': entry['rows'], 'candidates': [dict(grid[int(index)], score=score)
+                                                      for index, score in entry['scores'].items()]}
+               for entry in state['rounds']]
+    return {'best_params': grid[best], 'best_score': state['rounds'][-1]['scores'][str(best)],
+            'scoring': scoring, 'rounds': history}
@@ -0,0 +1,156 @@
+"""Time-windowed velocity features: activity over the last N seconds before each transaction.
+
+For every window of ``w`` seconds a transaction at time ``t`` gets:
+
+* ``count_<w>s``: earlier transactions with time in (t - w, t];
+* ``amount_sum_<w>s``: their total Amount;
+* ``amount_dev_<w>s``: Amount minus their mean Amount (0 when there are none).
+
+The export has no card or merchant id, so the windows run over the whole
+transaction stream.
+
+``VelocityState`` holds the transactions of the longest window in a ring
+buffer, with one head pointer and one running sum per window. ``update``
+handles a single transaction in amortised O(1): each one enters the buffer
+once and leaves each window once. This is the real-time path. ``transform``
+computes the same values for a whole batch with a sorted search and a
+cumulative sum, which is the training path. Both continue from the state the
+other left.
+
+Amounts are summed as integer cents, so the running sums never drift and
+both paths give bit-identical features regardless of batch boundaries.
+"""
+
+import re
+
+import numpy as np
+
+WINDOWS = (60, 600, 3600)
+_NAME = re.compile(r'^(count|amount_sum|amount_dev)_(\d+)s$')
+
+
+def feature_names(windows=WINDOWS):
+    return ['%s_%ds' % (kind, window) for window in windows for kind in ('count', 'amount_sum', 'amount_dev')]
+
+
+def windows_from_columns(columns):
+    """Windows whose features appear in ``columns``, or () if none do."""
+    return tuple(sorted({int(match.group(2)) for match in map(_NAME.match, columns) if match}))
+
+
+def _cents(amounts):
+    return np.round(np.asarray(amounts, dtype=np.float32).astype(np.float64) * 100).astype(np.int64)
+
+
+def _features(counts, sums, amounts):
+    """(rows, windows) counts and cent sums with (rows,) amounts -> (rows, 3 * windows) float32."""
+    amounts = np.asarray(amounts, dtype=np.float32).astype(np.float64)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(counts > 0, sums / np.maximum(counts, 1) / 100, amounts)
+    out = np.stack([counts, sums / 100, amounts - mean], axis=2)
+    return out.reshape(len(counts), -1).astype(np.float32)
+
+
+class VelocityState:
+    """Sliding-window aggregates over a time-ordered transaction stream."""
+
+    def __init__(self, windows=WINDOWS, capacity=1024):
+        self.windows = tuple(sorted(windows))
+        self.columns = feature_names(self.windows)
+        self._capacity = capacity
+        self._times = [0.0] * capacity
+        self._cents = [0] * capacity
+        # Absolute positions: the buffer holds transactions [heads[-1], end).
+        self._end = 0
+        self._heads = [0] * len(self.windows)
+        self._sums = [0] * len(self.windows)
+        self.last_time = -np.inf
+
+    def _check_order(self, time):
+        if time < self.last_time:
+            raise ValueError('transactions must arrive in Time order (%g after %g)' % (time, self.last_time))
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        times, cents = [0.0] * capacity, [0] * capacity
+        for position in range(self._heads[-1], self._end):
+            times[position % capacity] = self._times[position % self._capacity]
+            cents[position % capacity] = self._cents[position % self._capacity]
+        self._capacity, self._times, self._cents = capacity, times, cents
+
+    def update(self, time, amount):
+        """Features of one transaction, then add it to the windows. Returns a float32 row."""
+        time = float(np.float32(time))
+        self._check_order(time)
+        cents = int(_cents([amount])[0])
+        capacity = self._capacity
+        counts, sums = [], []
+        for k, window in enumerate(self.windows):
+            head, cutoff = self._heads[k], time - window
+            while head < self._end and self._times[head % capacity] <= cutoff:
+                self._sums[k] -= self._cents[head % capacity]
+                head += 1
+            self._heads[k] = head
+            counts.append(self._end - head)
+            sums.append(self._sums[k])
+        if self._end - self._heads[-1] == self._capacity:
+            self._grow()
+        self._times[self._end % self._capacity] = time
+        self._cents[self._end % self._capacity] = cents
+        self._end += 1
+        self._sums = [total + cents for total in self._sums]
+        self.last_time = time
+        return _features(np.array([counts]), np.array([sums]), [amount])[0]
+
+    def transform(self, times, amounts):
+        """Features of a batch of transactions in Time order, as a (rows, features) float32 array."""
+        times = np.asarray(times, dtype=np.float32).astype(np.float64)
+        if not len(times):
+            return np.empty((0, len(self.columns)), dtype=np.float32)
+        self._check_order(times[0])
+        if np.any(np.diff(times) < 0):
+            raise ValueError('transactions must arrive in Time order')
+        live = [position % self._capacity for position in range(self._heads[-1], self._end)]
+        n_live = len(live)
+        all_times = np.concatenate([np.array([self._times[i] for i in live], dtype=np.float64), times])
+        all_cents = np.concatenate([np.array([self._cents[i] for i in live], dtype=np.int64), _cents(amounts)])
+        cumulative = np.concatenate([[0], np.cumsum(all_cents)])
+        rows = np.arange(n_live, len(all_times))
+        starts = np.stack([np.searchsorted(all_times, times - window, side='right') for window in self.windows],
+                          axis=1)
+        counts = rows[:, None] - starts
+        sums = cumulative[rows][:, None] - cumulative[starts]
+        features = _features(counts, sums, amounts)
+
+        # Leave the state exactly as update() would after the last row.
+        last = starts[-1]
+        keep = int(last[-1])
+        self._end = self._heads[-1] + len(all_times)
+        base = self._heads[-1]
+        self._heads = [base + int(start) for start in last]
+        self._sums = [int(cumulative[-1] - cumulative[start]) for start in last]
+        while self._capacity < len(all_times) - keep:
+            self._capacity *= 2
+        self._times = [0.0] * self._capacity
+        self._cents = [0] * self._capacity
+        for index in range(keep, len(all_times)):
+            self._times[(base + index) % self._capacity] = float(all_times[index])
+            self._cents[(base + index) % self._capacity] = int(all_cents[index])
+        self.last_time = float(times[-1])
+        return features
+
+
+def velocity_features(times, amounts, windows=WINDOWS):
+    """Velocity features for a whole dataset, in the original row order.
+
+    Rows out of Time order are processed in stable Time order, the order a
+    live stream would have delivered them.
+    """
+    import pandas as pd
+
+    times = np.asarray(times)
+    order = np.argsort(times, kind='stable')
+    state = VelocityState(windows)
+    values = np.empty((len(times), len(state.columns)), dtype=np.float32)
+    values[order] = state.transform(times[order], np.asarray(amounts)[order])
+    return pd.DataFrame(values, columns=state.columns)
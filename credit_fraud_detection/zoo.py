@@ -0,0 +1,146 @@
+"""Concurrent training of the model zoo.
+
+Every configured estimator is fitted in its own worker process at the same
+time. The train/test arrays are written once as .npy files that each worker
+memory-maps read-only, so the operating system shares one copy through the
+page cache instead of pickling the matrices to every process.
+
+Cores are split so the pool does not oversubscribe the machine: estimators
+that fit on a single thread (logistic regression, SVC, naive Bayes) get one
+core each and the parallel ones (random forest, CNN) share the rest. With
+fewer cores than models, at most ``n_jobs`` models train at once, on one
+core each, and the rest wait in the pool's queue.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from .parallel import effective_n_jobs
+
+DEFAULT_MODELS = ('logistic_regression', 'svm', 'random_forest', 'naive_bayes')
+PARALLEL_MODELS = ('random_forest', 'cnn')
+OPTIONAL_MODELS = ('svm_approx',) + PARALLEL_MODELS
+ARRAYS = ('X_train', 'X_test', 'y_train', 'y_test')
+# Modules each fit function imports on first use; a worker loads them before starting the clock.
+FIT_IMPORTS = {
+    'logistic_regression': ('sklearn.linear_model', 'sklearn.pipeline', 'sklearn.preprocessing'),
+    'svm': ('sklearn.svm',),
+    'svm_approx': ('sklearn.kernel_approximation', 'sklearn.linear_model', 'sklearn.pipeline',
+                   'sklearn.preprocessing'),
+    'random_forest': ('sklearn.ensemble',),
+    'naive_bayes': ('sklearn.naive_bayes',),
+    'cnn': ('tensorflow',),
+}
+
+
+def allocate_cores(names, n_cores):
+    """Cores per model: one for each model, the remainder (if any) spread over the parallel ones."""
+    parallel = [name for name in names if name in PARALLEL_MODELS]
+    allocation = {name: 1 for name in names}
+    spare = n_cores - len(names)
+    for i, name in enumerate(parallel):
+        allocation[name] += max(0, spare) // len(parallel) + (i < max(0, spare) % len(parallel))
+    return allocation
+
+
+def write_arrays(directory, **arrays):
+    """Save arrays as .npy files for workers to memory-map."""
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(array))
+
+
+def _fit_function(name):
+    from . import models
+
+    return {
+        'logistic_regression': models.fit_logistic_regression,
+        'svm': models.fit_svm,
+        'svm_approx': models.fit_approximate_svm,
+        'random_forest': models.fit_random_forest,
+        'naive_bayes': models.fit_naive_bayes,
+        'cnn': models.fit_cnn,
+    }[name]
+
+
+def _train_worker(name, array_dir, n_threads, balance, random_state, params):
+    from importlib import import_module
+
+    from threadpoolctl import threadpool_limits
+
+    from . import models, sampling
+    from .evaluation import evaluate
+
+    X_train, X_test, y_train, y_test = (np.load(os.path.join(array_dir, array + '.npy'), mmap_mode='r')
+                                        for array in ARRAYS)
+    params = dict(params)
+    if name == 'random_forest':
+        params.setdefault('n_jobs', n_threads)
+    if name in ('random_forest', 'svm_approx'):
+        params.setdefault('random_state', random_state)
+    if balance != 'none':
+        if name == 'cnn':
+            params['sample_indices'] = sampling.oversample_indices(y_train, random_state=random_state)
+        elif balance == 'weights':
+            params['sample_weight'] = sampling.balanced_sample_weight(y_train)
+        else:
+            indices = sampling.oversample_indices(y_train, random_state=random_state)
+            params['sample_weight'] = sampling.index_weights(indices, len(y_train))
+    if name == 'cnn':
+        from .cnn import configure_threads
+
+        configure_threads(intra_op=n_threads, inter_op=1)
+        params.setdefault('verbose', 0)
+
+    fit = _fit_function(name)
+    for module in FIT_IMPORTS[name]:
+        import_module(module)
+    with threadpool_limits(limits=n_threads):
+        started = time.perf_counter()
+        model = fit(X_train, y_train, **params)
+        fit_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        y_pred = models.predict_classes(model, X_test)
+        y_score = models.predict_scores(model, X_test)
+        predict_seconds = time.perf_counter() - started
+    metrics = evaluate(y_test, y_pred, y_score)
+    metrics.update(fit_seconds=fit_seconds, predict_seconds=predict_seconds, cores=n_threads)
+    return name, metrics
+
+
+def run_zoo(X_train, X_test, y_train, y_test, names=DEFAULT_MODELS, n_jobs=-1, balance='none',
+            random_state=42, params=None):
+    """Fit ``names`` concurrently and return (comparison DataFrame, metrics by model)."""
+    import pandas as pd
+
+    names = list(names)
+    unknown = set(names) - set(DEFAULT_MODELS + OPTIONAL_MODELS)
+    if unknown:
+        raise ValueError('unknown models: %s' % ', '.join(sorted(unknown)))
+    params = params or {}
+    n_cores = effective_n_jobs(n_jobs)
+    cores = allocate_cores(names, n_cores)
+    array_dir = tempfile.mkdtemp(prefix='fraud-zoo-')
+    try:
+        write_arrays(array_dir, X_train=np.asarray(X_train, dtype=np.float32),
+                     X_test=np.asarray(X_test, dtype=np.float32),
+                     y_train=np.asarray(y_train).ravel(), y_test=np.asarray(y_test).ravel())
+        # Spawned workers avoid inheriting thread pools, which TensorFlow does not survive.
+        workers = min(len(names), n_cores)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+            futures = [pool.submit(_train_worker, name, array_dir, cores[name], balance, random_state,
+                                   params.get(name, {}))
+                       for name in names]
+            results = dict(future.result() for future in futures)
+    finally:
+        shutil.rmtree(array_dir, ignore_errors=True)
+    table = pd.DataFrame({name: {key: value for key, value in metrics.items() if key != 'confusion_matrix'}
+                          for name, metrics in results.items()}).T
+    columns = ['accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'fit_seconds', 'predict_seconds', 'cores']
+    table = table[columns].astype(float).astype({'cores': int})
+    return table, results